@@ -1,91 +1,511 @@
+import enum
+import math
+import os
 import pathlib
 import sys
+from array import array
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from functools import reduce
+from itertools import chain, combinations, repeat
+from multiprocessing import shared_memory
 from operator import mul
 
+import numpy as np
+
 INPUT_URL = 'https://adventofcode.com/2020/day/1/input'
 TARGET = 2020
 
+# The largest number of elements in any one broadcast block used by the NumPy triple search
+DEFAULT_BLOCK_SIZE = 1 << 22
+
+# The largest target for which we'll switch to the count-array searches (one byte per possible value)
+MAX_BITMAP_RANGE = 1 << 20
+
+# How many shards of the outer index range each worker gets in the parallel triple search
+SHARDS_PER_WORKER = 8
+
+# The parallel search's shared memory block holds a stop flag, padded to 8 bytes, followed by the sorted values
+_SHARED_HEADER_SIZE = 8
+
 sys.path.append(str(pathlib.Path(__file__).parent.parent))
 import utils
 
 
 # Notes:
 #   * These could've been made a lot easier using Numpy and logical indexing, but where's the fun in that? :)
+#     (For very large reports there is now a NumPy backend anyway - see `Backend`.)
 #   * I'm assuming positive, integer values in the input file. Let's not over-engineer too much...
 #   * The input data code is unnecessary, could just read a text file, but I fancied doing it!
 
 
 def parse_input_data(cache_file, url, cookie_file):
     """
-    Calls the utility function to load either a cached data file or pull it from the AoC server, then splits it
-    on newlines, strips the lines and extracts the integer values.
+    Calls the utility function to map either a cached data file or pull it from the AoC server, then streams
+    through its lines, stripping them and extracting the integer values.
 
     :param cache_file:      The file in which the input data is stored
     :param url:             The URL to the AoC page
     :param cookie_file:     The path to the cookie file (only used if the cache file isn't found
     :return: The input data as a list of ints
     """
-    raw_data = utils.load_input_data(cache_file, url, cookie_file)
-    return [int(r.strip()) for r in raw_data.split("\n") if r.strip() != ""]
+    raw_data = utils.map_input_data(cache_file, url, cookie_file)
+    return list(utils.parse_int_data(raw_data))
+
 
+def _cap_multiplicity(data, k):
+    """
+    No k-tuple can use a value more than k times, so any further copies of it are dead weight. Drop them and return
+    the rest sorted from smallest to largest.
 
-def find_2020_sum_pair(data):
+    :param data:    Iterable of integer inputs
+    :param k:       The number of values in the sum
+    :return:        Sorted list of the inputs, with each value appearing at most k times
     """
-    Sort the data from largest to smallest.
+    counts = Counter(data)
+    return sorted(chain.from_iterable(repeat(v, min(c, k)) for v, c in counts.items()))
+
+
+def _find_single_sums(data, target):
+    if target in data:
+        yield (target,)
 
-    Iterate through the data. Take the biggest untested number. Then work backwards from the smallest number to find
-    the right value. If the total exceeds the target (2020), then we know for sure that there is no small number in the\
-    list capable of summing with the big number to reach 2020.
 
+def _find_pair_sums(data, target):
     """
-    data = sorted(data, reverse=True)
+    Hash-set complement search. Check each distinct value's complement against the input, in whatever order the
+    values come, keeping only the pairs with the smaller value first. That's O(n) - only the matching pairs are
+    sorted, so that they come out in ascending order.
+    """
+    counts = Counter(data)
+    pairs = []
+    for value in counts:
+        complement = target - value
+        if complement < value:
+            continue
 
-    for idx, item in enumerate(data):
-        test_idx = range(len(data) - 1, idx, -1)
-        for rev_idx in test_idx:
-            reverse_item = data[rev_idx]
-            if item + reverse_item > TARGET:
-                break
+        if complement == value:
+            if counts[value] > 1:
+                pairs.append((value, value))
+        elif complement in counts:
+            pairs.append((value, complement))
 
-            if item + reverse_item == TARGET:
-                return item, reverse_item
+    yield from sorted(pairs)
 
-    return None, None
 
+def _find_triple_sums(data, target):
+    """
+    Two-pointer search over a single sorted array. Fix the smallest value, then walk a low pointer up and a high
+    pointer down through the rest of the array until they meet. Repeated values are skipped so each triple is only
+    produced once.
+    """
+    values = _cap_multiplicity(data, 3)
+    num_values = len(values)
+
+    for idx in range(num_values - 2):
+        item = values[idx]
+        if idx > 0 and item == values[idx - 1]:
+            continue
+
+        # The three smallest remaining values are already too big, so nothing after this can work
+        if item + values[idx + 1] + values[idx + 2] > target:
+            break
+
+        low, high = idx + 1, num_values - 1
+        while low < high:
+            total = item + values[low] + values[high]
+            if total < target:
+                low += 1
+            elif total > target:
+                high -= 1
+            else:
+                yield item, values[low], values[high]
+                low += 1
+                while low < high and values[low] == values[low - 1]:
+                    low += 1
+                high -= 1
+                while low < high and values[high] == values[high + 1]:
+                    high -= 1
+
+
+def _bitmap_counts(data, target, k):
+    """
+    If every value is non-negative, any value above the target can't be part of a sum, so the rest fit into an array
+    indexed by value. Count how often each value appears (saturating at k, as no k-tuple can use more copies).
 
-def find_2020_sum_triple(data):
+    :param data:    List of integer inputs
+    :param target:  The value the k numbers should sum to
+    :param k:       The number of values in the sum
+    :return:        The count array, or None if the values aren't bounded by a small enough range
     """
-    Similar to the above, but this time hunting three values that sum to 2020.
+    if not 0 <= target <= MAX_BITMAP_RANGE or len(data) == 0 or min(data) < 0:
+        return None
 
-    The basic algorithm is similar, use the big and small numbers to check if there's scope for another number to be
-    added to the sum in order to make 2020.
+    counts = bytearray(target + 1)
+    for value in data:
+        if value <= target and counts[value] < k:
+            counts[value] += 1
+    return counts
 
-    If big + small < 2020, then we'll check all the numbers in-between, starting small (because it's intuitively more
-    likely the intermediate value is at the smaller end).
 
-    :param data:
-    :param data: List of integer inputs
-    :return: The three values that sum to 2020.
+def _find_pair_sums_bitmap(counts, target):
+    """
+    O(n + target) pair search over the count array - check each value up to half the target against its complement.
+    """
+    for value in range(target // 2 + 1):
+        complement = target - value
+        if counts[value] and counts[complement] and (value != complement or counts[value] > 1):
+            yield value, complement
+
+
+def _find_triple_sums_bitmap(counts, target):
+    """
+    Triple search over the count array. Walk the distinct values present for the smallest two numbers, then the
+    third is a single lookup. This is O(n + u^2) for u distinct values, and u can never exceed the target.
     """
-    data = sorted(data, reverse=True)
+    present = [v for v, c in enumerate(counts) if c]
+
+    for idx, a in enumerate(present):
+        if 3 * a > target:
+            break
 
-    for idx, item in enumerate(data):
-        test_idx = range(len(data) - 1, idx + 1, -1)
-        for rev_idx in test_idx:
-            reverse_item = data[rev_idx]
-            if item + reverse_item > TARGET:
+        for b in present[idx:]:
+            c = target - a - b
+            if c < b:
                 break
+            if not counts[c]:
+                continue
+
+            if a == b == c:
+                enough = counts[a] > 2
+            elif a == b:
+                enough = counts[a] > 1
+            elif b == c:
+                enough = counts[b] > 1
+            else:
+                enough = True
+
+            if enough:
+                yield a, b, c
+
 
-            for mid_item in data[rev_idx:idx:-1]:
-                total = mid_item + item + reverse_item
-                if total == TARGET:
-                    return mid_item, item, reverse_item
+def _find_k_sums_meet_in_middle(data, target, k):
+    """
+    Meet-in-the-middle search for larger k. Every k-tuple of (sorted) indices splits uniquely into its first k//2
+    indices and the remainder, so tabulate the sums of all the left-hand halves, then for every right-hand half look
+    up the sum that's missing. The halves only combine if the left one finishes before the right one starts.
+    """
+    values = _cap_multiplicity(data, k)
+    left_size = k // 2
+    right_size = k - left_size
+
+    # sum -> left-hand values -> the smallest last index we can make them with
+    left_halves = defaultdict(dict)
+    for idxs in combinations(range(len(values)), left_size):
+        half = tuple(values[i] for i in idxs)
+        last_idx = left_halves[sum(half)].get(half, idxs[-1])
+        left_halves[sum(half)][half] = min(last_idx, idxs[-1])
+
+    # right-hand values -> the largest first index we can make them with
+    right_halves = {}
+    for idxs in combinations(range(len(values)), right_size):
+        half = tuple(values[i] for i in idxs)
+        right_halves[half] = max(right_halves.get(half, idxs[0]), idxs[0])
+
+    found = set()
+    for right_half, first_idx in right_halves.items():
+        for left_half, last_idx in left_halves.get(target - sum(right_half), {}).items():
+            if last_idx < first_idx:
+                found.add(left_half + right_half)
+
+    yield from sorted(found)
+
+
+def find_k_sum(data, target, k):
+    """
+    Find every set of k values in the data that sum to the target.
+
+    The search strategy depends on k:
+        * k = 1: membership check
+        * k = 2: hash-set complement lookup, O(n) (plus sorting the matches)
+        * k = 3: two-pointer scan over one sorted array, O(n^2)
+        * k > 3: meet-in-the-middle over the two halves of the tuple, O(n^ceil(k/2))
+
+    For k = 2 and k = 3, if the values are all non-negative and the target is small (as it is for the expense
+    report), we skip the sorting altogether and search a count array indexed by value instead.
+
+    Values may be repeated in a tuple as many times as they appear in the data. Each tuple is sorted from smallest
+    to largest and only produced once, and the tuples are produced in ascending order.
 
-                if total > TARGET:
-                    break
+    :param data:    Iterable of integer inputs
+    :param target:  The value the k numbers should sum to
+    :param k:       The number of values in the sum
+    :return:        Generator over the matching tuples
+    """
+    if k < 1:
+        raise ValueError(f"Can't find a sum of {k} values")
+
+    if k == 1:
+        return _find_single_sums(data, target)
+
+    if k in (2, 3):
+        data = list(data)
+        counts = _bitmap_counts(data, target, k)
+        if counts is not None:
+            bitmap_search = _find_pair_sums_bitmap if k == 2 else _find_triple_sums_bitmap
+            return bitmap_search(counts, target)
+
+    if k == 2:
+        return _find_pair_sums(data, target)
+    if k == 3:
+        return _find_triple_sums(data, target)
+    return _find_k_sums_meet_in_middle(data, target, k)
+
+
+class Backend(enum.Enum):
+    PYTHON = 0
+    NUMPY = 1
+    PARALLEL = 2
 
-    return None, None, None
+
+def _unique_with_counts(data):
+    return np.unique(np.asarray(data, dtype=np.int64), return_counts=True)
+
+
+def find_pair_sums_np(data, target):
+    """
+    Vectorised equivalent of the pair search in `find_k_sum`. Look up the complement of every distinct value in the
+    sorted distinct values with `np.searchsorted`, then keep those that were found (and, where a value is its own
+    complement, appeared at least twice).
+
+    :param data:    Iterable of integer inputs
+    :param target:  The value the pair should sum to
+    :return:        List of the matching pairs, in ascending order
+    """
+    values, counts = _unique_with_counts(data)
+    if len(values) == 0:
+        return []
+
+    complements = target - values
+    pos = np.minimum(np.searchsorted(values, complements), len(values) - 1)
+    found = values[pos] == complements
+
+    mask = found & ((values < complements) | ((values == complements) & (counts > 1)))
+    return [(int(v), int(c)) for v, c in zip(values[mask], complements[mask])]
+
+
+def _triple_block_matches(values, counts, target, rows, cols):
+    """
+    Evaluate one block of the NumPy triple search: the rows [rows.start, rows.stop) as a, against the columns
+    [cols.start, cols.stop) as b.
+
+    :return: Arrays of the a, b and c values of each matching triple in the block, in ascending order
+    """
+    row_idx = np.arange(rows.start, rows.stop)[:, None]
+    a = values[rows, None]
+
+    # Walk b downwards, so that c comes out in ascending order along each row - `searchsorted` is much faster with
+    # (mostly) sorted keys
+    col_idx = np.arange(cols.stop - 1, cols.start - 1, -1)
+    b = values[cols][::-1]
+
+    c = (target - a) - b
+    pos = np.searchsorted(values, c)
+    np.minimum(pos, len(values) - 1, out=pos)
+
+    hit_rows, hit_cols = np.nonzero((values[pos] == c) & (col_idx >= row_idx) & (c >= b))
+    order = np.lexsort((col_idx[hit_cols], hit_rows))
+    hit_rows, hit_cols = hit_rows[order], hit_cols[order]
+
+    a, b, c = a[hit_rows, 0], b[hit_cols], c[hit_rows, hit_cols]
+    enough_a = counts[row_idx[hit_rows, 0]] >= 1 + (a == b) + (a == c)
+    enough_b = (a == b) | (counts[col_idx[hit_cols]] >= 1 + (b == c))
+    mask = enough_a & enough_b
+    return a[mask], b[mask], c[mask]
+
+
+def find_triple_sums_np(data, target, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Vectorised equivalent of the triple search in `find_k_sum`.
+
+    Each triple is produced once, as a <= b <= c over the distinct values. So for each a, the only b worth trying
+    run from a itself up to (target - a) / 2 - past that, c would be smaller than b. The search runs over blocks of
+    rows of a, each broadcast against just the columns of b that the block's first row needs. Work out c for every
+    (a, b) pair in the block, look it up with `np.searchsorted`, then check that any repeated values appear often
+    enough in the data.
+
+    A block never holds more than `block_size` pairs - if a single row of b values is longer than that, it's split
+    across blocks too - which bounds the memory use no matter how large the report is.
+
+    :param data:        Iterable of integer inputs
+    :param target:      The value the triple should sum to
+    :param block_size:  The largest number of (a, b) pairs to evaluate at once
+    :return:            Generator over the matching triples, in ascending order
+    """
+    values, counts = _unique_with_counts(data)
+
+    # The b values for each a stop here. That only gets earlier as a increases, so once a row has no b values
+    # left, nor do any of the rows after it.
+    stops = np.searchsorted(values, (target - values) // 2, side='right')
+    num_rows = int(np.count_nonzero(stops > np.arange(len(values))))
+
+    start = 0
+    while start < num_rows:
+        col_start, col_stop = start, int(stops[start])
+        stop = min(start + max(1, block_size // (col_stop - col_start)), num_rows)
+
+        for col_block in range(col_start, col_stop, block_size):
+            cols = slice(col_block, min(col_block + block_size, col_stop))
+            for a, b, c in zip(*_triple_block_matches(values, counts, target, slice(start, stop), cols)):
+                yield int(a), int(b), int(c)
+
+        start = stop
+
+
+def _search_triple_shard(shm_name, num_values, start, stop, target):
+    """
+    Worker for `find_triple_sums_parallel`. Runs the two-pointer search for the outer indices [start, stop) over the
+    sorted values in shared memory, checking the shared stop flag before each outer index so that the shard gives
+    up as soon as anyone has found a triple.
+
+    Indexing the shared block element by element is much slower than indexing a list, so the values this shard can
+    reach (everything from just before `start` to the end) are read out into a local list first.
+
+    :return: The first triple found in this shard, or None
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    flag = shm.buf[:_SHARED_HEADER_SIZE]
+    base = max(start - 1, 0)
+    shared_values = shm.buf[_SHARED_HEADER_SIZE:_SHARED_HEADER_SIZE + 8 * num_values].cast('q')
+
+    try:
+        values = shared_values[base:].tolist()
+        last = num_values - 1 - base
+
+        for idx in range(start - base, stop - base):
+            if flag[0]:
+                return None
+
+            item = values[idx]
+            if idx > 0 and item == values[idx - 1]:
+                continue
+            if item + values[idx + 1] + values[idx + 2] > target:
+                return None
+
+            low, high = idx + 1, last
+            while low < high:
+                total = item + values[low] + values[high]
+                if total < target:
+                    low += 1
+                elif total > target:
+                    high -= 1
+                else:
+                    flag[0] = 1
+                    return item, values[low], values[high]
+        return None
+    finally:
+        shared_values.release()
+        flag.release()
+        shm.close()
+
+
+def _shard_bounds(num_outer, num_values, num_shards):
+    """
+    The two-pointer scan for outer index i costs O(n - i), so equal-width shards would leave the first workers with
+    most of the work. Split the outer index range so that each shard has roughly the same total cost instead.
+    """
+    bounds = [num_outer]
+    for s in range(num_shards - 1, 0, -1):
+        remaining = math.sqrt(s / num_shards) * num_values
+        bounds.append(min(bounds[-1], max(0, round(num_values - remaining))))
+    bounds.append(0)
+    bounds.reverse()
+    return [(lo, hi) for lo, hi in zip(bounds, bounds[1:]) if lo < hi]
+
+
+def find_triple_sums_parallel(data, target, workers=None, shards_per_worker=SHARDS_PER_WORKER):
+    """
+    Parallel version of the two-pointer triple search.
+
+    The sorted values are copied once into a shared memory block that every worker reads in place. The outer index
+    range is split into shards of roughly equal cost, which are handed out to a process pool. As soon as a shard
+    finds a triple, a flag in the shared block tells the running shards to stop, and any shards that haven't started
+    are cancelled.
+
+    Unlike the serial searches, this returns whichever triple is found first, not necessarily the smallest.
+
+    :param data:                Iterable of integer inputs
+    :param target:              The value the triple should sum to
+    :param workers:             Number of worker processes, defaults to the number of CPUs
+    :param shards_per_worker:   How many shards to split the work into per worker
+    :return:                    A matching triple, or None
+    """
+    values = array('q', _cap_multiplicity(data, 3))
+    num_values = len(values)
+    if num_values < 3:
+        return None
+
+    workers = workers or os.cpu_count()
+    shards = _shard_bounds(num_values - 2, num_values, workers * shards_per_worker)
+
+    shm = shared_memory.SharedMemory(create=True, size=_SHARED_HEADER_SIZE + values.itemsize * num_values)
+    try:
+        shm.buf[:_SHARED_HEADER_SIZE] = bytes(_SHARED_HEADER_SIZE)
+        shm.buf[_SHARED_HEADER_SIZE:_SHARED_HEADER_SIZE + values.itemsize * num_values] = values.tobytes()
+
+        result = None
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = {pool.submit(_search_triple_shard, shm.name, num_values, lo, hi, target) for lo, hi in shards}
+            while pending and result is None:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                result = next((f.result() for f in done if f.result() is not None), None)
+
+            shm.buf[0] = 1
+            for future in pending:
+                future.cancel()
+        return result
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def find_2020_sum_pair(data, backend=Backend.PYTHON):
+    """
+    Find the first pair of values that sum to 2020, using `find_k_sum` (which will pick the count-array search for
+    any sensible report) or the NumPy equivalent.
+
+    The pair search is linear, so the parallel backend just uses `find_k_sum`.
+
+    :param data:    List of integer inputs
+    :param backend: Which implementation of the search to use
+    :return: The two values that sum to 2020.
+    """
+    if backend == Backend.NUMPY:
+        pairs = iter(find_pair_sums_np(data, TARGET))
+    else:
+        pairs = find_k_sum(data, TARGET, 2)
+    return next(pairs, (None, None))
+
+
+def find_2020_sum_triple(data, backend=Backend.PYTHON, block_size=DEFAULT_BLOCK_SIZE, workers=None):
+    """
+    Similar to the above, but this time hunting three values that sum to 2020, using `find_k_sum`, the blocked
+    NumPy search or the multi-process search.
+
+    :param data:        List of integer inputs
+    :param backend:     Which implementation of the search to use
+    :param block_size:  Largest broadcast block for the NumPy search
+    :param workers:     Number of processes for the parallel search
+    :return: The three values that sum to 2020.
+    """
+    if backend == Backend.PARALLEL:
+        return find_triple_sums_parallel(data, TARGET, workers) or (None, None, None)
+
+    if backend == Backend.NUMPY:
+        triples = find_triple_sums_np(data, TARGET, block_size)
+    else:
+        triples = find_k_sum(data, TARGET, 3)
+    return next(triples, (None, None, None))
 
 
 def check(numbers, expected_len):
@@ -0,0 +1,150 @@
+import random
+from itertools import combinations
+
+import pytest
+
+from day1 import (
+    TARGET,
+    MAX_BITMAP_RANGE,
+    Backend,
+    _bitmap_counts,
+    _shard_bounds,
+    find_k_sum,
+    find_pair_sums_np,
+    find_triple_sums_np,
+    find_triple_sums_parallel,
+    find_2020_sum_pair,
+    find_2020_sum_triple
+)
+
+EXAMPLE_DATA = [1721, 979, 366, 299, 675, 1456]
+
+
+def brute_force_k_sum(data, target, k):
+    return sorted({tuple(sorted(c)) for c in combinations(data, k) if sum(c) == target})
+
+
+def test_find_2020_sum_pair_example():
+    assert sorted(find_2020_sum_pair(EXAMPLE_DATA)) == [299, 1721]
+
+
+def test_find_2020_sum_triple_example():
+    assert sorted(find_2020_sum_triple(EXAMPLE_DATA)) == [366, 675, 979]
+
+
+@pytest.mark.parametrize(
+    "data, k",
+    [
+        ([1, 2, 3], 2),
+        ([1, 2, 3], 3),
+        ([TARGET + 1, TARGET + 2], 2)
+    ]
+)
+def test_find_2020_sum_none(data, k):
+    find_fn = find_2020_sum_pair if k == 2 else find_2020_sum_triple
+    assert find_fn(data) == (None,) * k
+
+
+@pytest.mark.parametrize(
+    "data, target, k, expected",
+    [
+        ([1010, 1010], TARGET, 2, [(1010, 1010)]),
+        ([1010, 3, 1010], TARGET, 2, [(1010, 1010)]),
+        ([1010], TARGET, 2, []),
+        ([5, 5, 5, 5], 15, 3, [(5, 5, 5)]),
+        ([5, 5], 15, 3, []),
+        ([1, 2, 3, 4], 4, 1, [(4,)]),
+        ([1, 2, 3, 4], 5, 1, []),
+        ([1, 1, 1, 1, 1], 4, 4, [(1, 1, 1, 1)]),
+        ([1, 1, 1], 4, 4, []),
+    ]
+)
+def test_find_k_sum_duplicates(data, target, k, expected):
+    assert list(find_k_sum(data, target, k)) == expected
+
+
+@pytest.mark.parametrize("k", [2, 3, 4, 5])
+def test_find_k_sum_matches_brute_force(k):
+    rng = random.Random(k)
+    data = [rng.randint(-5, 30) for _ in range(14)]
+    assert list(find_k_sum(data, 40, k)) == brute_force_k_sum(data, 40, k)
+
+
+def test_find_k_sum_invalid_k():
+    with pytest.raises(ValueError):
+        list(find_k_sum(EXAMPLE_DATA, TARGET, 0))
+
+
+@pytest.mark.parametrize("backend", list(Backend))
+def test_find_2020_sums_backends(backend):
+    assert sorted(find_2020_sum_pair(EXAMPLE_DATA, backend)) == [299, 1721]
+    assert sorted(find_2020_sum_triple(EXAMPLE_DATA, backend)) == [366, 675, 979]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("block_size", [1, 7, 1 << 20])
+def test_numpy_sums_match_python(seed, block_size):
+    rng = random.Random(seed)
+    data = [rng.randint(0, 60) for _ in range(40)]
+    assert find_pair_sums_np(data, 60) == list(find_k_sum(data, 60, 2))
+    assert list(find_triple_sums_np(data, 60, block_size)) == list(find_k_sum(data, 60, 3))
+
+
+@pytest.mark.parametrize("block_size", [1, 5, 1 << 20])
+def test_numpy_triples_negative_and_repeated(block_size):
+    rng = random.Random(block_size)
+    data = [rng.randint(-30, 40) for _ in range(50)] + [5, 5, 5, -10, -10]
+    assert list(find_triple_sums_np(data, 15, block_size)) == brute_force_k_sum(data, 15, 3)
+
+
+def test_numpy_sums_empty():
+    assert find_pair_sums_np([], TARGET) == []
+    assert list(find_triple_sums_np([], TARGET)) == []
+
+
+@pytest.mark.parametrize(
+    "data, target, expected_bitmap",
+    [
+        ([1, 2, 3], TARGET, True),
+        ([1, 2, TARGET * 10], TARGET, True),
+        ([-1, 2, 3], TARGET, False),
+        ([], TARGET, False),
+        ([1, 2, 3], MAX_BITMAP_RANGE + 1, False),
+    ]
+)
+def test_bitmap_counts_detection(data, target, expected_bitmap):
+    assert (_bitmap_counts(data, target, 2) is not None) == expected_bitmap
+
+
+@pytest.mark.parametrize("k", [2, 3])
+@pytest.mark.parametrize("seed", range(5))
+def test_bitmap_sums_match_brute_force(k, seed):
+    rng = random.Random(seed)
+    data = [rng.randint(0, 50) for _ in range(30)]
+    assert list(find_k_sum(data, 50, k)) == brute_force_k_sum(data, 50, k)
+
+
+@pytest.mark.parametrize("num_values, num_shards", [(3, 4), (10, 3), (1000, 16)])
+def test_shard_bounds_cover_range(num_values, num_shards):
+    shards = _shard_bounds(num_values - 2, num_values, num_shards)
+    assert shards[0][0] == 0
+    assert shards[-1][1] == num_values - 2
+    assert all(a[1] == b[0] for a, b in zip(shards, shards[1:]))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_parallel_triple_is_valid(seed):
+    rng = random.Random(seed)
+    data = [rng.randint(-20, 60) for _ in range(60)]
+    expected = brute_force_k_sum(data, 60, 3)
+
+    triple = find_triple_sums_parallel(data, 60, workers=2)
+    if expected:
+        assert tuple(sorted(triple)) in expected
+    else:
+        assert triple is None
+
+
+def test_parallel_triple_no_match():
+    assert find_triple_sums_parallel([1, 2], TARGET, workers=2) is None
+    assert find_triple_sums_parallel([1, 2, 3], TARGET, workers=2) is None
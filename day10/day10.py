@@ -57,7 +57,7 @@ def task_2(raw_data):
 
 
 if __name__ == "__main__":
-    input_data = utils.load_input_data("cached_input.txt", INPUT_URL, '../session_cookie.txt')
+    input_data = utils.map_input_data("cached_input.txt", INPUT_URL, '../session_cookie.txt')
     print("Task 1:")
     task_1(input_data)
 
@@ -1,89 +1,315 @@
 import pathlib
 import re
 import sys
+from array import array
+
+import numpy as np
 
 INPUT_URL = 'https://adventofcode.com/2020/day/2/input'
 TARGET = 2020
 
+# The largest number of password bytes to lay out in one block of the NumPy checks
+DEFAULT_BLOCK_SIZE = 1 << 22
+
 sys.path.append(str(pathlib.Path(__file__).parent.parent))
 import utils
 
+# One policy per line: `<min>-<max> <letter>: <password>`
+POLICY_PATTERN = re.compile(rb'^(\d+)-(\d+)[ \t](\w):[ \t](\S+)[ \t\r]*$', re.MULTILINE)
+
+
+class PolicyColumns:
+    """
+    Columnar store for the parsed password policies.
+
+    Rather than a tuple (and four objects) per row, the mins, maxes and letters are each held in a single typed
+    array, and the passwords are concatenated into one buffer with an array of offsets into it.
+
+    Indexing or iterating gives back rows in the original (min_val, max_val, req_letter, password) form, so the
+    validity checks work on either representation.
+    """
+
+    def __init__(self):
+        self.mins = array('L')
+        self.maxes = array('L')
+        self.letters = bytearray()
+        self.offsets = array('Q', [0])
+        self.passwords = bytearray()
+
+    def append(self, min_val, max_val, letter, password):
+        """
+        :param min_val:     The first number of the policy
+        :param max_val:     The second number of the policy
+        :param letter:      The byte value of the required letter
+        :param password:    The password, as a bytes-like object
+        """
+        self.mins.append(min_val)
+        self.maxes.append(max_val)
+        self.letters.append(letter)
+        self.passwords += password
+        self.offsets.append(len(self.passwords))
+
+    def password(self, idx):
+        return bytes(self.passwords[self.offsets[idx]:self.offsets[idx + 1]])
+
+    def __len__(self):
+        return len(self.mins)
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("Policy index out of range")
+
+        return self.mins[idx], self.maxes[idx], chr(self.letters[idx]), self.password(idx).decode()
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+def parse_policies(raw_data):
+    """
+    Run the precompiled policy pattern over the whole input buffer in one go, collecting the matches straight into
+    columns. Lines that don't match the pattern are skipped.
+
+    :param raw_data: The input data, as a string, bytes-like buffer or `MappedInput`
+    :return: The parsed policies as `PolicyColumns`
+    """
+    columns = PolicyColumns()
+    with utils.input_buffer(raw_data) as buffer:
+        for m in POLICY_PATTERN.finditer(buffer):
+            columns.append(int(m[1]), int(m[2]), buffer[m.start(3)], buffer[m.start(4):m.end(4)])
+    return columns
+
+
+def iter_policies(raw_data):
+    """
+    Streaming version of `parse_policies`, which yields each row as it's matched rather than storing it. Over a
+    `MappedInput`, only the current row is ever held in memory.
+
+    :param raw_data: The input data, as a string, bytes-like buffer or `MappedInput`
+    :return: Generator over rows of (min_val, max_val, req_letter, password)
+    """
+    with utils.input_buffer(raw_data) as buffer:
+        for m in POLICY_PATTERN.finditer(buffer):
+            yield int(m[1]), int(m[2]), chr(buffer[m.start(3)]), m[4].decode()
+
 
 def parse_input_data(cache_file, url, cookie_file):
     """
-    Calls the utility function to load either a cached data file or pull it from the AoC server, then splits it
-    on newlines, strips the lines and extracts the password rules.
+    Calls the utility function to map either a cached data file or pull it from the AoC server, then parses the
+    password rules out of the mapped buffer.
 
     :param cache_file:      The file in which the input data is stored
     :param url:             The URL to the AoC page
     :param cookie_file:     The path to the cookie file (only used if the cache file isn't found
-    :return: The input data as a list of rows, where each row is (min_val, max_val, required_letter, password)
+    :return: The input data as `PolicyColumns`, where each row is (min_val, max_val, required_letter, password)
     """
 
-    raw_data = utils.load_input_data(cache_file, url, cookie_file)
+    raw_data = utils.map_input_data(cache_file, url, cookie_file)
+    return parse_policies(raw_data)
 
-    def extract_info(line):
-        m = re.match(r'^(\d+)-(\d+)\s(\w+):\s([^\s]+)\s*$', line)
-        if m is None:
-            return None
 
-        min_val = int(m.group(1))
-        max_val = int(m.group(2))
-        req_letter = m.group(3)
-        password = m.group(4)
+def is_valid_task_1(row):
+    """
+    The task 1 validity rule, where `x-y z:` indicates the character `z` must appear between `x` and `y` times.
 
-        return (min_val, max_val, req_letter, password)
+    :param row: (min_val, max_val, req_letter, password)
+    :return: True if the password meets the requirements
+    """
+    min_val, max_val, req_letter, password = row
+    num_letter = password.count(req_letter)
+    return min_val <= num_letter <= max_val
 
-    data = [extract_info(line) for line in raw_data.split("\n")]
-    return [d for d in data if d is not None]
 
+def is_valid_task_2(row):
+    """
+    The task 2 validity rule, where `x-y z:` indicates the character `z` must appear at either position `x` or `y`,
+    but not both. `x` and `y` are 1-indexed, not 0-indexed.
 
-def check_pwd_validity_task_1(input_data):
+    :param row: (first_pos, second_pos, req_letter, password)
+    :return: True if the password meets the requirements
     """
-    Run through all the loaded password/rule combinations and return only those that are valid.
+    first_pos, second_pos, req_letter, password = row
+    is_first_pos = password[first_pos - 1] == req_letter
+    is_second_pos = password[second_pos - 1] == req_letter
+    return is_first_pos != is_second_pos
 
-    This uses the task 1 validity rule, where `x-y z:` indicates the character `z` must appear between `x` and `y`
-    times.
 
-    :param input_data: The rows of parsed input data, where each row contains (min_val, max_val, req_letter, password).
-    :return: The rows from above where the password meets the requirements.
+def _column_view(column):
+    """
+    View one of the typed arrays (or the bytearrays) of `PolicyColumns` as a NumPy array, without copying it.
     """
+    return np.frombuffer(column, dtype=np.dtype(f'u{memoryview(column).itemsize}'))
 
-    def check_valid(row):
-        min_val, max_val, req_letter, password = row
-        num_letter = password.count(req_letter)
-        return min_val <= num_letter <= max_val
 
-    return [r for r in input_data if check_valid(r)]
+def _iter_password_blocks(columns, block_size):
+    """
+    Lay the passwords out in blocks of a fixed-width byte matrix (padded with zeros), alongside the matching slices
+    of the policy columns. Each block holds at most `block_size` bytes (or a single row, if a password is longer).
 
+    The columns are read in place, and each block's matrix is filled by scattering its run of the password buffer
+    straight into the cells that each password covers.
 
-def check_pwd_validity_task_2(input_data):
+    :param columns:     `PolicyColumns` to evaluate
+    :param block_size:  Largest number of bytes per block
+    :return: Generator over (mins, maxes, letters, lengths, password matrix) per block
     """
-    Run through all the loaded password/rule combinations and return only those that are valid.
+    if len(columns) == 0:
+        return
+
+    mins = _column_view(columns.mins)
+    maxes = _column_view(columns.maxes)
+    letters = _column_view(columns.letters)
+    offsets = _column_view(columns.offsets).astype(np.int64)
+    passwords = _column_view(columns.passwords)
+
+    lengths = np.diff(offsets)
+    width = max(int(lengths.max()), 1)
+    rows_per_block = max(1, block_size // width)
+    char_idx = np.arange(width)
+
+    for start in range(0, len(columns), rows_per_block):
+        stop = min(start + rows_per_block, len(columns))
+        block_lengths = lengths[start:stop]
+
+        # The cells are filled in row-major order, which is the order the passwords are laid out in the buffer
+        matrix = np.zeros((stop - start, width), dtype=np.uint8)
+        matrix[char_idx < block_lengths[:, None]] = passwords[offsets[start]:offsets[stop]]
+        yield mins[start:stop], maxes[start:stop], letters[start:stop], block_lengths, matrix
+
+
+def _check_valid_np_task_1(mins, maxes, letters, lengths, matrix):
+    # Sum in the narrowest type that can hold a full row - it's much quicker than summing in int64
+    num_letter = (matrix == letters[:, None]).sum(axis=1, dtype=np.min_scalar_type(matrix.shape[1]))
+    return (mins <= num_letter) & (num_letter <= maxes)
 
-    This uses the task 2 validity rule, where `x-y z:` indicates the character `z` must appear at either position `x`
-    or `y`, but not both. `x` and `y` are 1-indexed, not 0-indexed.
+
+def _check_valid_np_task_2(first_pos, second_pos, letters, lengths, matrix):
+    rows = np.arange(len(matrix))
+
+    def is_letter_at(pos):
+        # Match the pure Python indexing: position 0 wraps round to the last character, past the end is an error
+        idx = pos.astype(np.int64) - 1
+        if np.any(idx >= lengths):
+            raise IndexError("string index out of range")
+        idx = np.where(idx < 0, lengths + idx, idx)
+        return matrix[rows, idx] == letters
+
+    return is_letter_at(first_pos) != is_letter_at(second_pos)
+
+
+def _valid_masks_np(columns, checks, block_size):
+    """
+    Build each block of the password matrix once, and run every one of the checks over it.
+
+    :return: List of the boolean masks, one per check
+    """
+    masks = [[] for _ in checks]
+    for block in _iter_password_blocks(columns, block_size):
+        for check_masks, check_valid in zip(masks, checks):
+            check_masks.append(check_valid(*block))
+    return [np.concatenate(m) if m else np.zeros(0, dtype=bool) for m in masks]
+
+
+def valid_mask_task_1_np(columns, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Vectorised version of `is_valid_task_1` over the whole of the columnar parse: count the occurrences of each
+    row's letter by comparing it against its row of the password matrix.
+
+    :param columns:     `PolicyColumns` from `parse_policies`
+    :param block_size:  Largest number of password bytes to evaluate at once
+    :return: Boolean array, True for each valid row
+    """
+    mask, = _valid_masks_np(columns, [_check_valid_np_task_1], block_size)
+    return mask
+
+
+def valid_mask_task_2_np(columns, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Vectorised version of `is_valid_task_2` over the whole of the columnar parse: gather the character at each of
+    the two positions from the password matrix and XOR the matches.
+
+    Positions index bytes rather than characters, so this agrees with `is_valid_task_2` for ASCII passwords.
+
+    :param columns:     `PolicyColumns` from `parse_policies`
+    :param block_size:  Largest number of password bytes to evaluate at once
+    :return: Boolean array, True for each valid row
+    """
+    mask, = _valid_masks_np(columns, [_check_valid_np_task_2], block_size)
+    return mask
+
+
+def check_pwd_validity_task_1(input_data, use_numpy=False):
+    """
+    Run through all the loaded password/rule combinations and return only those that are valid under the task 1
+    rule (see `is_valid_task_1`).
+
+    :param input_data: The rows of parsed input data, where each row contains (min_val, max_val, req_letter, password).
+    :param use_numpy:  Evaluate the rule with `valid_mask_task_1_np` (input_data must be `PolicyColumns`)
+    :return: The rows from above where the password meets the requirements.
+    """
+    if use_numpy:
+        return [input_data[i] for i in np.flatnonzero(valid_mask_task_1_np(input_data))]
+    return [r for r in input_data if is_valid_task_1(r)]
+
+
+def check_pwd_validity_task_2(input_data, use_numpy=False):
+    """
+    Run through all the loaded password/rule combinations and return only those that are valid under the task 2
+    rule (see `is_valid_task_2`).
 
     :param input_data: The rows of parsed input data, where each row contains (min_val, max_val, req_letter, password).
+    :param use_numpy:  Evaluate the rule with `valid_mask_task_2_np` (input_data must be `PolicyColumns`)
     :return: The rows from above where the password meets the requirements.
     """
+    if use_numpy:
+        return [input_data[i] for i in np.flatnonzero(valid_mask_task_2_np(input_data))]
+    return [r for r in input_data if is_valid_task_2(r)]
 
-    def check_valid(row):
-        first_pos, second_pos, req_letter, password = row
-        is_first_pos = password[first_pos - 1] == req_letter
-        is_second_pos = password[second_pos - 1] == req_letter
-        return (is_first_pos or is_second_pos) and not (is_first_pos and is_second_pos)
 
-    return [r for r in input_data if check_valid(r)]
+def iter_valid_passwords(input_data):
+    """
+    Check both rules in a single pass over the data, streaming out every row that's valid under at least one of
+    them. Nothing is stored, so this runs in constant memory over a streamed input (e.g. from `iter_policies`).
+
+    :param input_data: Iterable of rows of (min_val, max_val, req_letter, password)
+    :return: Generator over (row, is_valid_task_1, is_valid_task_2)
+    """
+    for row in input_data:
+        valid_1 = is_valid_task_1(row)
+        valid_2 = is_valid_task_2(row)
+        if valid_1 or valid_2:
+            yield row, valid_1, valid_2
+
+
+def count_valid_passwords(input_data, use_numpy=False):
+    """
+    Check both rules in a single pass over the data, only keeping count of the valid rows.
+
+    :param input_data: Iterable of rows of (min_val, max_val, req_letter, password)
+    :param use_numpy:  Count using the vectorised checks instead, with both rules sharing each block of the
+                       password matrix (input_data must be `PolicyColumns`). Around 3x quicker from a thousand rows up.
+    :return: The number of valid passwords under the task 1 and task 2 rules
+    """
+    if use_numpy:
+        masks = _valid_masks_np(input_data, [_check_valid_np_task_1, _check_valid_np_task_2], DEFAULT_BLOCK_SIZE)
+        return tuple(int(np.count_nonzero(m)) for m in masks)
+
+    num_valid_1 = 0
+    num_valid_2 = 0
+    for row in input_data:
+        num_valid_1 += is_valid_task_1(row)
+        num_valid_2 += is_valid_task_2(row)
+    return num_valid_1, num_valid_2
 
 
 if __name__ == "__main__":
-    input_data = parse_input_data("cached_input.txt", INPUT_URL, '../session_cookie.txt')
+    raw_data = utils.map_input_data("cached_input.txt", INPUT_URL, '../session_cookie.txt')
+    num_valid_1, num_valid_2 = count_valid_passwords(iter_policies(raw_data))
 
     print("Task 1:")
-    d = check_pwd_validity_task_1(input_data)
-    print(f"Found {len(d)} valid passwords")
+    print(f"Found {num_valid_1} valid passwords")
 
     print("Task 2:")
-    d = check_pwd_validity_task_2(input_data)
-    print(f"Found {len(d)} valid passwords")
+    print(f"Found {num_valid_2} valid passwords")
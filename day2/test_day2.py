@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+from day2 import (
+    PolicyColumns,
+    parse_policies,
+    iter_policies,
+    is_valid_task_1,
+    is_valid_task_2,
+    check_pwd_validity_task_1,
+    check_pwd_validity_task_2,
+    iter_valid_passwords,
+    count_valid_passwords,
+    valid_mask_task_1_np,
+    valid_mask_task_2_np
+)
+
+EXAMPLE_DATA = """1-3 a: abcde
+1-3 b: cdefg
+2-9 c: ccccccccc
+"""
+
+
+def test_parse_policies_example():
+    columns = parse_policies(EXAMPLE_DATA)
+    assert isinstance(columns, PolicyColumns)
+    assert list(columns) == [
+        (1, 3, "a", "abcde"),
+        (1, 3, "b", "cdefg"),
+        (2, 9, "c", "ccccccccc")
+    ]
+    assert columns[-1] == (2, 9, "c", "ccccccccc")
+
+
+@pytest.mark.parametrize(
+    "raw_data, expected_rows",
+    [
+        ("1-3 a: abcde\nnot a policy\n\n4-5 z: zz  \n", [(1, 3, "a", "abcde"), (4, 5, "z", "zz")]),
+        ("1-3 a: abcde\r\n2-4 b: bbb", [(1, 3, "a", "abcde"), (2, 4, "b", "bbb")]),
+        (b"10-12 x: xyz\n", [(10, 12, "x", "xyz")]),
+        ("", [])
+    ]
+)
+def test_parse_policies_skips_invalid_lines(raw_data, expected_rows):
+    assert list(parse_policies(raw_data)) == expected_rows
+
+
+def test_check_validity_example():
+    columns = parse_policies(EXAMPLE_DATA)
+    assert len(check_pwd_validity_task_1(columns)) == 2
+    assert len(check_pwd_validity_task_2(columns)) == 1
+
+
+def test_iter_policies_matches_columns():
+    assert list(iter_policies(EXAMPLE_DATA)) == list(parse_policies(EXAMPLE_DATA))
+
+
+def test_count_valid_passwords_example():
+    assert count_valid_passwords(iter_policies(EXAMPLE_DATA)) == (2, 1)
+
+
+def test_iter_valid_passwords_example():
+    assert list(iter_valid_passwords(iter_policies(EXAMPLE_DATA))) == [
+        ((1, 3, "a", "abcde"), True, True),
+        ((2, 9, "c", "ccccccccc"), True, False)
+    ]
+
+
+def random_policies(seed, num_rows=200):
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(num_rows):
+        password = "".join(rng.choice("abc") for _ in range(rng.randint(1, 12)))
+        first = rng.randint(1, len(password))
+        second = rng.randint(first, len(password))
+        lines.append(f"{first}-{second} {rng.choice('abc')}: {password}")
+    return "\n".join(lines)
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("block_size", [1, 50, 1 << 20])
+def test_numpy_validity_matches_python(seed, block_size):
+    columns = parse_policies(random_policies(seed))
+    assert list(valid_mask_task_1_np(columns, block_size)) == list(map(is_valid_task_1, columns))
+    assert list(valid_mask_task_2_np(columns, block_size)) == list(map(is_valid_task_2, columns))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_numpy_count_matches_python(seed):
+    columns = parse_policies(random_policies(seed))
+    assert count_valid_passwords(columns, use_numpy=True) == count_valid_passwords(columns)
+
+    # The columns are only viewed, not held on to, so they can still grow afterwards
+    columns.append(1, 2, ord("a"), b"ab")
+    assert count_valid_passwords(columns, use_numpy=True) == count_valid_passwords(columns)
+
+
+def test_numpy_check_validity_example():
+    columns = parse_policies(EXAMPLE_DATA)
+    assert check_pwd_validity_task_1(columns, use_numpy=True) == check_pwd_validity_task_1(columns)
+    assert check_pwd_validity_task_2(columns, use_numpy=True) == check_pwd_validity_task_2(columns)
+    assert count_valid_passwords(columns, use_numpy=True) == (2, 1)
+    assert count_valid_passwords(parse_policies(""), use_numpy=True) == (0, 0)
+
+
+def test_numpy_position_out_of_range():
+    columns = parse_policies("1-4 a: abc")
+    with pytest.raises(IndexError):
+        valid_mask_task_2_np(columns)
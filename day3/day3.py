@@ -1,7 +1,6 @@
-import math
 import pathlib
 import sys
-from functools import reduce
+from functools import cached_property, reduce
 from operator import mul
 
 import numpy as np
@@ -11,35 +10,134 @@ import utils
 
 INPUT_URL = 'https://adventofcode.com/2020/day/3/input'
 
+TREE = ord('#')
 
-# I'm going to import numpy to make repeating right easier...
+# Rows of the map to unpack at once while loading it
+DEFAULT_BLOCK_ROWS = 1 << 14
 
-def get_map(raw_data, num_rights):
-    """
-    For each line in the map text file, load it into a boolean array, then convert to
-    numpy, to allow us to tile it easily (this isn't required for the algo, but saves
-    some boilerplate).
 
-    We work out how many times to replicate the map right by taking the number of right
-    moves to make on a single row, then multiplying that by the number of rows. We then
-    ceil-divide that to get the number of copies of the map we need right-wards.
+class TreeMap:
+    """
+    Bit-packed map of the trees - one bit per cell rather than a byte (or a Python bool) - with each row padded out
+    to a whole number of bytes.
 
-    :param raw_data:    The raw text data from the input file
-    :param num_rights:  The largest number of right-moves we need per row.
-    :return:            The map, sufficiently wide for the required moves, as a boolean np array.
+    Indexing with (row, col) looks the cell up, wrapping the column round the width of the map as it repeats
+    right-wards forever. Row and col can be ints or arrays of indices. Indexing with just a row slice gives back
+    a `TreeMap` of those rows.
     """
-    map = []
-    for line in raw_data.split("\n"):
-        if line.strip() != "":
-            map.append([c == '#' for c in line.strip()])
 
-    np_map = np.array(map)
+    def __init__(self, bits, width):
+        self.bits = bits
+        self.width = width
+
+    @classmethod
+    def from_buffer(cls, buffer, block_rows=DEFAULT_BLOCK_ROWS):
+        """
+        Parse the raw bytes of the map straight into packed bits.
+
+        If the map is laid out as we'd expect (every row the same width, one row per line), the rows are simply a
+        strided view onto the buffer (see `utils.fixed_width_rows`), which we compare against '#' and pack
+        `block_rows` rows at a time. Otherwise, fall back to reading it line by line.
+
+        :param buffer:      The raw map, as a bytes-like buffer
+        :param block_rows:  Number of rows to unpack at once, which bounds the memory used while loading
+        :return:            The map as a `TreeMap`
+        """
+        rows = utils.fixed_width_rows(buffer)
+        if rows is None:
+            return cls.from_lines(bytes(buffer).decode())
+
+        height, width = rows.shape
+        bits = np.empty((height, (width + 7) // 8), dtype=np.uint8)
+        for block_start in range(0, height, block_rows):
+            block = rows[block_start:block_start + block_rows]
+            if np.any(block == utils.NEWLINE):
+                return cls.from_lines(bytes(buffer).decode())
+            bits[block_start:block_start + block_rows] = np.packbits(block == TREE, axis=1)
+        return cls(bits, width)
+
+    @classmethod
+    def from_lines(cls, raw_data):
+        """
+        For each line in the map text file, load it into a boolean array, then pack it into bits.
+
+        :param raw_data:    The raw text data from the input file
+        :return:            The map as a `TreeMap`
+        """
+        map = [[c == '#' for c in line.strip()] for line in utils.iter_lines(raw_data) if line.strip() != ""]
+        if len(map) == 0:
+            return cls(np.zeros((0, 0), dtype=np.uint8), 0)
+        if any(len(row) != len(map[0]) for row in map):
+            raise ValueError("All rows of the map must be the same width")
+
+        return cls(np.packbits(np.array(map, dtype=bool), axis=1), len(map[0]))
+
+    @property
+    def shape(self):
+        return self.bits.shape[0], self.width
 
-    # Figure out how many times we need to repeat the map right to handle all moves
-    total_right = np_map.shape[0] * num_rights
-    num_repeats = math.ceil(total_right / np_map.shape[1])
+    @cached_property
+    def packed_bytes(self):
+        """
+        The packed bits as a flat memoryview of bytes, row after row, for lookups that don't
+        go through NumPy at all. It's a view, so no copy is made (unless the bits aren't
+        contiguous to begin with, e.g. a strided slice of the rows).
+        """
+        return memoryview(np.ascontiguousarray(self.bits)).cast('B')
 
-    return np.tile(np_map, (1, num_repeats))
+    @property
+    def row_bytes(self):
+        return self.bits.shape[1]
+
+    def is_tree(self, row, col):
+        """
+        Scalar version of `lookup`, for a single int row and col. It reads the cell out of a
+        memoryview of the packed bits, so it stays in plain ints throughout.
+        """
+        if row < 0:
+            row += self.bits.shape[0]
+        if not 0 <= row < self.bits.shape[0]:
+            raise IndexError("Row index out of range")
+
+        col %= self.width
+        return self.packed_bytes[row * self.row_bytes + (col >> 3)] >> (7 - (col & 7)) & 1 == 1
+
+    def lookup(self, rows, cols):
+        """
+        :param rows:    Row index (or array of them)
+        :param cols:    Column index (or array of them), wrapped round the width of the map
+        :return:        Whether there's a tree in each of the cells
+        """
+        cols = np.asarray(cols) % self.width
+        return ((self.bits[rows, cols >> 3] >> (7 - (cols & 7))) & 1).astype(bool)
+
+    def to_array(self):
+        return np.unpackbits(self.bits, axis=1, count=self.width).astype(bool)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            rows, cols = key
+            if isinstance(rows, int) and isinstance(cols, int):
+                return self.is_tree(rows, cols)
+            hits = self.lookup(rows, cols)
+            return bool(hits) if hits.ndim == 0 else hits
+        if isinstance(key, slice):
+            return TreeMap(self.bits[key], self.width)
+        raise TypeError("Index a TreeMap with (row, col), or slice its rows")
+
+
+def get_map(raw_data):
+    """
+    Load the map text straight from the raw bytes into a bit-packed `TreeMap`.
+
+    The map repeats right-wards forever, but there's no need to make copies of it for
+    that - `traverse` just wraps the column index round the width of this one.
+
+    :param raw_data:    The raw text data from the input file
+    :return:            The map as a `TreeMap`.
+    """
+    with utils.input_buffer(raw_data) as buffer:
+        return TreeMap.from_buffer(buffer)
 
 
 def traverse(map, rights, downs):
@@ -47,24 +145,89 @@ def traverse(map, rights, downs):
     Traverse a map, created using `get_map`, by repeating through the move and advancing a
     position pointer accordingly. We stop when we've passed beyond the last row of the map.
 
+    The map repeats to the right, so the column wraps round modulo the map's width. Each cell
+    is read straight out of the map's packed bytes (see `TreeMap.is_tree`), so the loop
+    never touches NumPy.
+
     As we hit a tree, we increment a counter, which is retuened at the end.
 
-    :param map:     Boolean numpy map from `get_map`
+    :param map:     `TreeMap` from `get_map`
     :param rights:  The number of right-cells to move in a single step
     :param downs:   The number of down-cells to move in a single step
     :return:        The number of trees we hit along the way.
     """
-    current_pos = [0, 0]
+    height, width = map.shape
+    packed, row_bytes = map.packed_bytes, map.row_bytes
+    row, col = 0, 0
 
     num_trees = 0
 
-    while current_pos[0] < map.shape[0]:
-        is_tree = map[current_pos[0], current_pos[1]]
-        if is_tree:
-            num_trees += 1
+    while row < height:
+        num_trees += packed[row * row_bytes + (col >> 3)] >> (7 - (col & 7)) & 1
+
+        row += downs
+        col = (col + rights) % width
+    return num_trees
+
+
+def count_trees(map, slopes):
+    """
+    Vectorised version of `traverse` for any number of slopes at once.
+
+    For each (right, down) slope, the rows visited are every `down`th row and the column
+    on the nth step is `n * right`, wrapped round the width of the map. Gather all the
+    cells for every slope with a single fancy index, then sum each slope's section.
+
+    :param map:     `TreeMap` from `get_map`
+    :param slopes:  Sequence of (rights, downs) moves
+    :return:        Array with the number of trees hit on each slope.
+    """
+    height, width = map.shape
+    if height == 0 or len(slopes) == 0:
+        return np.zeros(len(slopes), dtype=np.int64)
+
+    rows = [np.arange(0, height, down) for _, down in slopes]
+    cols = [(np.arange(len(r)) * right) % width for (right, _), r in zip(slopes, rows)]
+
+    hits = map.lookup(np.concatenate(rows), np.concatenate(cols)).astype(np.int64)
+    starts = np.cumsum([0] + [len(r) for r in rows[:-1]])
+    return np.add.reduceat(hits, starts)
+
+
+def traverse_stream(raw_data, slopes):
+    """
+    Streaming version of `count_trees`, for maps too big to hold in memory.
+
+    Each slope keeps a cursor - the next row it will land on, and its column there. As
+    each row of the map arrives, any slope whose cursor is on that row checks the cell
+    and moves its cursor on by its (right, down) move. Nothing is kept of a row once
+    it's been checked, so memory only grows with the number of slopes.
+
+    :param raw_data:    The map, as anything `utils.iter_lines` accepts (e.g. a line iterator)
+    :param slopes:      Sequence of (rights, downs) moves
+    :return:            List with the number of trees hit on each slope.
+    """
+    num_trees = [0] * len(slopes)
+    next_rows = [0] * len(slopes)
+    cols = [0] * len(slopes)
+
+    row_idx = 0
+    for line in utils.iter_lines(raw_data):
+        line = line.strip()
+        if line == "":
+            continue
+
+        for i, (rights, downs) in enumerate(slopes):
+            if next_rows[i] != row_idx:
+                continue
+
+            if line[cols[i]] == '#':
+                num_trees[i] += 1
+
+            next_rows[i] += downs
+            cols[i] = (cols[i] + rights) % len(line)
+        row_idx += 1
 
-        current_pos[0] += downs
-        current_pos[1] += rights
     return num_trees
 
 
@@ -72,29 +235,30 @@ def task_1(data):
     """
     Navigate the map with the given move of (3, 1)
     :param data: The raw data from the input file
-    :return: None
+    :return: The number of trees hit
     """
-    map = get_map(data, 3)
-    trees = traverse(map, 3, 1)
+    map = get_map(data)
+    trees = int(count_trees(map, [(3, 1)])[0])
     print(f"Hit {trees} trees along the way")
+    return trees
 
 
 def task_2(data, routes):
     """
     Navigate the map with the set of moved provided for task 2.
     :param data: The raw data from the input file
-    :return: None
+    :return: The product of the trees hit on each route
     """
-    max_right = max(r[0] for r in routes)
-    map = get_map(data, max_right)
+    map = get_map(data)
 
-    route_trees = [traverse(map, r[0], r[1]) for r in routes]
-    prod = reduce(mul, route_trees, 1)
+    route_trees = count_trees(map, routes)
+    prod = reduce(mul, (int(t) for t in route_trees), 1)
     print(f"Hit {prod} trees along the way over all paths")
+    return prod
 
 
 if __name__ == "__main__":
-    input_data = utils.load_input_data("cached_input.txt", INPUT_URL, '../session_cookie.txt')
+    input_data = utils.map_input_data("cached_input.txt", INPUT_URL, '../session_cookie.txt')
 
     print("Task 1:")
     task_1(input_data)
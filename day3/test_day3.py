@@ -0,0 +1,133 @@
+import mock
+import numpy as np
+import pytest
+
+from day3 import (
+    TreeMap,
+    get_map,
+    traverse,
+    count_trees,
+    traverse_stream,
+    task_1,
+    task_2
+)
+import utils
+
+EXAMPLE_DATA = """..##.......
+#...#...#..
+.#....#..#.
+..#.#...#.#
+.#...##..#.
+..#.##.....
+.#.#.#....#
+.#........#
+#.##...#...
+#...##....#
+.#..#...#.#
+"""
+
+ROUTES = [(1, 1), (3, 1), (5, 1), (7, 1), (1, 2)]
+
+
+def naive_map(raw_data):
+    return np.array([[c == '#' for c in line.strip()] for line in raw_data.split("\n") if line.strip() != ""])
+
+
+def test_get_map_is_not_tiled():
+    map = get_map(EXAMPLE_DATA)
+    assert isinstance(map, TreeMap)
+    assert map.shape == (11, 11)
+    assert map.bits.nbytes == 11 * 2
+
+
+@pytest.mark.parametrize(
+    "raw_data",
+    [
+        EXAMPLE_DATA,
+        EXAMPLE_DATA.strip(),
+        EXAMPLE_DATA.replace("\n", "\r\n"),
+        "\n\n" + EXAMPLE_DATA + "\n\n",
+        EXAMPLE_DATA.replace("\n", "\n\n"),
+        "#",
+        "#.#.#.#.#\n.........\n"
+    ]
+)
+def test_get_map_matches_naive_parse(raw_data):
+    map = get_map(raw_data)
+    assert np.array_equal(map.to_array(), naive_map(raw_data))
+    assert np.array_equal(TreeMap.from_buffer(raw_data.encode(), block_rows=2).to_array(), naive_map(raw_data))
+
+
+@pytest.mark.parametrize(
+    "raw_data",
+    [
+        EXAMPLE_DATA,
+        EXAMPLE_DATA.strip(),
+        EXAMPLE_DATA.replace("\n", "\r\n"),
+        EXAMPLE_DATA.replace("\n", "\r\n").strip(),
+    ]
+)
+def test_get_map_uses_strided_view(raw_data):
+    with mock.patch.object(TreeMap, "from_lines") as from_lines:
+        map = get_map(raw_data)
+
+    from_lines.assert_not_called()
+    assert np.array_equal(map.to_array(), naive_map(raw_data))
+
+
+def test_get_map_ragged_rows():
+    with pytest.raises(ValueError):
+        get_map("..#\n.#\n")
+
+
+def test_get_map_ragged_rows_mapped(tmp_path):
+    path = tmp_path / "input.txt"
+    # Lines up with the line endings of a 3-wide map, so the rows are viewed before it falls back
+    path.write_bytes(b"..#\n.\n#\n.#.\n")
+    with pytest.raises(ValueError):
+        get_map(utils.MappedInput(path))
+
+
+def test_tree_map_indexing():
+    map = get_map(EXAMPLE_DATA)
+    expected = naive_map(EXAMPLE_DATA)
+
+    assert map[0, 2] is True
+    assert map[0, 13] is True
+    assert map[0, 0] is False
+    assert map.is_tree(1, 15) is True
+    assert np.shares_memory(np.asarray(map.packed_bytes), map.bits)
+    assert all(map.is_tree(r, c) == expected[r, c % 11] for r in range(11) for c in range(30))
+    assert np.array_equal(map[2:5].to_array(), expected[2:5])
+    assert np.array_equal(map[np.arange(11), np.arange(11) * 3], expected[np.arange(11), (np.arange(11) * 3) % 11])
+
+
+@pytest.mark.parametrize(
+    "rights, downs, expected",
+    [(1, 1, 2), (3, 1, 7), (5, 1, 3), (7, 1, 4), (1, 2, 2), (47, 1, 7)]
+)
+def test_traverse_example(rights, downs, expected):
+    map = get_map(EXAMPLE_DATA)
+    assert traverse(map, rights, downs) == expected
+
+
+def test_tasks_example(capsys):
+    assert task_1(EXAMPLE_DATA) == 7
+    assert task_2(EXAMPLE_DATA, ROUTES) == 336
+
+
+def test_count_trees_matches_traverse():
+    map = get_map(EXAMPLE_DATA)
+    slopes = [(r, d) for r in range(0, 25) for d in range(1, 13)]
+    assert list(count_trees(map, slopes)) == [traverse(map, r, d) for r, d in slopes]
+
+
+def test_count_trees_no_slopes():
+    assert len(count_trees(get_map(EXAMPLE_DATA), [])) == 0
+
+
+def test_traverse_stream_matches_count_trees():
+    slopes = [(r, d) for r in range(0, 25) for d in range(1, 13)]
+    expected = list(count_trees(get_map(EXAMPLE_DATA), slopes))
+    assert traverse_stream(EXAMPLE_DATA, slopes) == expected
+    assert traverse_stream(iter(EXAMPLE_DATA.splitlines()), slopes) == expected
@@ -1,5 +1,10 @@
+import os
 import pathlib
+import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 
 sys.path.append(str(pathlib.Path(__file__).parent.parent))
 import utils
@@ -17,59 +22,227 @@ REQUIRED_FIELDS = [
     "pid"
 ]
 
+ALL_FIELDS = (*REQUIRED_FIELDS, "cid")
 
-def parse_passports(raw_data):
-    cur_lines = []
+VALIDATION_PLAN = validators.compile_plan(REQUIRED_FIELDS)
+
+# A blank line (possibly containing whitespace) - the only safe place to split the input
+BLANK_LINE_PATTERN = re.compile(rb'\n[ \t\r]*\n')
+
+# How many chunks of the input each worker gets in the parallel count
+CHUNKS_PER_WORKER = 4
+
+
+class Passport:
+    """
+    Compact passport record, with a slot for each known field (None if the passport doesn't have it) rather than a
+    dict per passport. Any fields we don't know about are dropped.
+
+    Supports enough of the dict interface (`in`, `get` and `items`) to be used in place of the old parsed dicts.
+    """
+    __slots__ = ALL_FIELDS
+
+    def __init__(self, **fields):
+        for f in ALL_FIELDS:
+            setattr(self, f, fields.get(f))
+
+    def __contains__(self, field):
+        return self.get(field) is not None
+
+    def __eq__(self, other):
+        return dict(self.items()) == dict(other.items())
+
+    def get(self, field, default=None):
+        value = getattr(self, field, None) if field in ALL_FIELDS else None
+        return default if value is None else value
+
+    def items(self):
+        return ((f, getattr(self, f)) for f in ALL_FIELDS if getattr(self, f) is not None)
+
+
+class PassportColumns:
+    """
+    Column-wise store of a batch of passports: for each field, a fixed-width bytes array of the values (empty where
+    missing) and a boolean mask of which passports have that field.
+    """
+
+    def __init__(self, values, present):
+        self.values = values
+        self.present = present
 
-    passports = []
+    @classmethod
+    def from_passports(cls, passports):
+        columns = {f: [] for f in ALL_FIELDS}
+        for p in passports:
+            for f in ALL_FIELDS:
+                columns[f].append(getattr(p, f))
 
-    def parse(lines):
-        flattened = " ".join(lines)
-        pieces = flattened.split(" ")
-        return dict(p.split(":") for p in pieces)
+        values = {f: np.array([(v or "").encode() for v in col], dtype=bytes) for f, col in columns.items()}
+        present = {f: np.array([v is not None for v in col], dtype=bool) for f, col in columns.items()}
+        return cls(values, present)
 
-    for line in raw_data.split("\n"):
-        if line.strip() == "" and len(cur_lines) > 0:
-            passports.append(parse(cur_lines))
-            cur_lines = []
+    def __len__(self):
+        return len(self.present[ALL_FIELDS[0]])
+
+    def has_fields(self, fields):
+        mask = np.ones(len(self), dtype=bool)
+        for f in fields:
+            mask &= self.present[f]
+        return mask
+
+    def valid_fields(self, fields):
+        """
+        Run the vectorised validator for each field over its whole column.
+
+        :param fields:  The fields a passport must have, and which must all be valid
+        :return:        Boolean array, True for each passport that has all the fields, all valid
+        """
+        mask = self.has_fields(fields)
+        for f in fields:
+            mask &= validators.column_validators[f](self.values[f])
+        return mask
+
+
+def iter_passports(raw_data):
+    """
+    Scan through the input once, filling in a `Passport` from the `key:value` pairs on each line and yielding it
+    as soon as we hit the blank line at the end of the record.
+
+    :param raw_data: The input data, as anything `utils.iter_lines` accepts
+    :return: Generator over the `Passport`s in the input
+    """
+    passport = None
+    for line in utils.iter_lines(raw_data):
+        pieces = line.split()
+        if len(pieces) == 0:
+            if passport is not None:
+                yield passport
+                passport = None
             continue
-        cur_lines.append(line)
 
-    if cur_lines:
-        passports.append(parse(cur_lines))
+        if passport is None:
+            passport = Passport()
 
-    return passports
+        for piece in pieces:
+            key, _, value = piece.partition(":")
+            if key in ALL_FIELDS:
+                setattr(passport, key, value)
+
+    if passport is not None:
+        yield passport
+
+
+def parse_passports(raw_data):
+    return list(iter_passports(raw_data))
 
 
 def has_correct_fields(passport):
     return all(f in passport for f in REQUIRED_FIELDS)
 
 
-def task_1(data):
-    pports = parse_passports(data)
-    valid = [p for p in pports if has_correct_fields(p)]
-    print(f"Valid passports: {len(valid)}")
+def validate_fields(passport):
+    return VALIDATION_PLAN(passport)
+
+
+def count_valid_passports(passports, use_numpy=False):
+    """
+    Check the passports for both tasks in a single pass.
+
+    :param passports: Iterable of passports, e.g. from `iter_passports`
+    :param use_numpy: Load the passports into `PassportColumns` and check them with the vectorised validators
+    :return: The number of passports with all the required fields, and the number where those fields are also valid
+    """
+    if use_numpy:
+        columns = PassportColumns.from_passports(passports)
+        return int(columns.has_fields(REQUIRED_FIELDS).sum()), int(columns.valid_fields(REQUIRED_FIELDS).sum())
+
+    num_has_fields = 0
+    num_valid = 0
+    for p in passports:
+        if has_correct_fields(p):
+            num_has_fields += 1
+            num_valid += validate_fields(p)
+    return num_has_fields, num_valid
+
+
+def split_at_records(buffer, num_chunks):
+    """
+    Split the buffer into (roughly) `num_chunks` even pieces, without cutting through a record. Each split is moved
+    forward from its even byte offset to the next blank line, so every chunk holds only whole records.
+
+    :param buffer:      The raw input, as a bytes-like buffer
+    :param num_chunks:  How many chunks to aim for
+    :return:            List of (start, stop) byte offsets, one per chunk
+    """
+    bounds = [0]
+    for i in range(1, num_chunks):
+        m = BLANK_LINE_PATTERN.search(buffer, max(len(buffer) * i // num_chunks, bounds[-1]))
+        if m is None:
+            break
+        if m.start() + 1 > bounds[-1]:
+            bounds.append(m.start() + 1)
+    bounds.append(len(buffer))
+    return [(start, stop) for start, stop in zip(bounds, bounds[1:]) if start < stop]
+
+
+def _count_chunk(path, start, stop, use_numpy):
+    """
+    Worker for `count_valid_passports_parallel` - map the input and run the serial count over one chunk of it.
+    """
+    with utils.MappedInput(path).open() as buffer:
+        chunk = buffer[start:stop].decode()
+    return count_valid_passports(iter_passports(chunk), use_numpy)
+
+
+def count_valid_passports_parallel(raw_data, workers=None, chunks_per_worker=CHUNKS_PER_WORKER, use_numpy=False):
+    """
+    Parallel version of `count_valid_passports` over a file on disk. The mapped file is split into chunks at record
+    boundaries (see `split_at_records`), each worker maps the file itself and counts the passports in its chunks,
+    and the counts are summed.
+
+    :param raw_data:            A `MappedInput`, or the path to the input file
+    :param workers:             Number of worker processes, defaults to the number of CPUs
+    :param chunks_per_worker:   How many chunks to split the input into per worker
+    :param use_numpy:           Use the vectorised validators in each worker
+    :return: The number of passports with all the required fields, and the number where those fields are also valid
+    """
+    path = raw_data.path if isinstance(raw_data, utils.MappedInput) else pathlib.Path(raw_data)
+    workers = workers or os.cpu_count()
+
+    with utils.MappedInput(path).open() as buffer:
+        chunks = split_at_records(buffer, workers * chunks_per_worker)
+
+    num_has_fields = 0
+    num_valid = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_count_chunk, path, start, stop, use_numpy) for start, stop in chunks]
+        for f in futures:
+            chunk_has_fields, chunk_valid = f.result()
+            num_has_fields += chunk_has_fields
+            num_valid += chunk_valid
+    return num_has_fields, num_valid
 
 
-def task_2(data):
-    pports = parse_passports(data)
-
-    has_all_fields = [p for p in pports if has_correct_fields(p)]
+def task_1(data):
+    num_valid = sum(has_correct_fields(p) for p in iter_passports(data))
+    print(f"Valid passports: {num_valid}")
+    return num_valid
 
-    def validate_fields(p):
-        return all([validators.validators[k](v) for k, v in p.items()])
 
-    has_valid_fields = [p for p in has_all_fields if validate_fields(p)]
-    print(f"Valid passports: {len(has_valid_fields)}")
+def task_2(data):
+    _, num_valid = count_valid_passports(iter_passports(data))
+    print(f"Valid passports: {num_valid}")
+    return num_valid
 
 
 if __name__ == "__main__":
-    input_data = utils.load_input_data("cached_input.txt", INPUT_URL, '../session_cookie.txt')
+    input_data = utils.map_input_data("cached_input.txt", INPUT_URL, '../session_cookie.txt')
+    num_has_fields, num_valid = count_valid_passports(iter_passports(input_data))
 
     print("Task 1:")
-    task_1(input_data)
+    print(f"Valid passports: {num_has_fields}")
 
     print("")
 
     print("Task 2:")
-    task_2(input_data)
+    print(f"Valid passports: {num_valid}")
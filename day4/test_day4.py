@@ -0,0 +1,177 @@
+import pathlib
+import random
+
+import pytest
+
+import validators
+
+from day4 import (
+    REQUIRED_FIELDS,
+    Passport,
+    PassportColumns,
+    iter_passports,
+    parse_passports,
+    has_correct_fields,
+    validate_fields,
+    count_valid_passports,
+    count_valid_passports_parallel,
+    split_at_records,
+    task_1,
+    task_2
+)
+
+EXAMPLE_DATA = (pathlib.Path(__file__).parent / "basic_input.txt").read_text()
+EXAMPLE_DATA_TASK_2 = (pathlib.Path(__file__).parent / "basic_input_t2.txt").read_text()
+
+
+def naive_parse(raw_data):
+    records = [r for r in raw_data.split("\n\n") if r.strip() != ""]
+    return [dict(p.split(":") for p in r.split()) for r in records]
+
+
+@pytest.mark.parametrize("raw_data", [EXAMPLE_DATA, EXAMPLE_DATA_TASK_2, "\n\n" + EXAMPLE_DATA + "\n\n\n"])
+def test_iter_passports_matches_naive_parse(raw_data):
+    passports = list(iter_passports(raw_data))
+    assert [dict(p.items()) for p in passports] == naive_parse(raw_data)
+
+
+def test_passport_record():
+    passport = parse_passports("byr:1937 foo:bar\niyr:2017\n")[0]
+    assert isinstance(passport, Passport)
+    assert passport == Passport(byr="1937", iyr="2017")
+    assert "byr" in passport
+    assert "hgt" not in passport
+    assert "foo" not in passport
+    assert passport.get("hgt", "missing") == "missing"
+
+
+def test_has_correct_fields_example():
+    assert [has_correct_fields(p) for p in iter_passports(EXAMPLE_DATA)] == [True, False, True, False]
+
+
+@pytest.mark.parametrize(
+    "raw_data, expected",
+    [
+        (EXAMPLE_DATA, (2, 2)),
+        (EXAMPLE_DATA_TASK_2, (8, 4))
+    ]
+)
+def test_count_valid_passports_example(raw_data, expected):
+    assert count_valid_passports(iter_passports(raw_data)) == expected
+
+
+def test_tasks_example(capsys):
+    assert task_1(EXAMPLE_DATA) == 2
+    assert task_2(EXAMPLE_DATA_TASK_2) == 4
+
+
+@pytest.mark.parametrize(
+    "field, value, expected",
+    [
+        ("byr", "2002", True),
+        ("byr", "2003", False),
+        ("byr", "02002", False),
+        ("iyr", "2010", True),
+        ("eyr", "2031", False),
+        ("hgt", "60in", True),
+        ("hgt", "190cm", True),
+        ("hgt", "190in", False),
+        ("hgt", "190", False),
+        ("hgt", "cm", False),
+        ("hcl", "#123abc", True),
+        ("hcl", "#123abz", False),
+        ("hcl", "123abc", False),
+        ("hcl", "", False),
+        ("ecl", "brn", True),
+        ("ecl", "wat", False),
+        ("pid", "000000001", True),
+        ("pid", "0123456789", False),
+        ("cid", "anything", True),
+    ]
+)
+def test_validators(field, value, expected):
+    assert validators.validators[field](value) is expected
+
+
+def test_validation_plan_fails_on_missing_field():
+    passport = Passport(byr="1980", iyr="2012", eyr="2030", hgt="74in", hcl="#623a2f", ecl="grn", pid="087499704")
+    assert validate_fields(passport)
+
+    passport.pid = None
+    assert not validate_fields(passport)
+
+
+def random_passports(seed, num_passports=300):
+    rng = random.Random(seed)
+    candidates = {
+        "byr": ["1920", "2002", "2003", "1919", "19200", "abcd", "", "0"],
+        "iyr": ["2010", "2020", "2021", "2009", "x2015"],
+        "eyr": ["2020", "2030", "2031", "2019", "2025"],
+        "hgt": ["150cm", "193cm", "194cm", "59in", "76in", "77in", "58in", "170", "cm", "in", "0170cm", "1x0cm",
+                "60cmin", "99999999999999999999999cm", "160mm"],
+        "hcl": ["#123abc", "#123abz", "123abc", "#123ab", "#123abcd", "#ABCDEF", "#", ""],
+        "ecl": sorted(validators.EYE_COLOURS) + ["wat", "am", "ambb", ""],
+        "pid": ["000000001", "0123456789", "12345678", "12345678a", "987654321"],
+        "cid": ["1", ""],
+    }
+
+    passports = []
+    for _ in range(num_passports):
+        fields = {f: rng.choice(v) for f, v in candidates.items() if rng.random() < 0.9}
+        passports.append(Passport(**fields))
+    return passports
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_column_validation_matches_plan(seed):
+    passports = random_passports(seed)
+    columns = PassportColumns.from_passports(passports)
+
+    assert list(columns.has_fields(REQUIRED_FIELDS)) == [has_correct_fields(p) for p in passports]
+    assert list(columns.valid_fields(REQUIRED_FIELDS)) == [validate_fields(p) for p in passports]
+    for f, column_validator in validators.column_validators.items():
+        values = [p.get(f, "") for p in passports]
+        assert list(column_validator(columns.values[f])) == [validators.validators[f](v) for v in values]
+
+
+@pytest.mark.parametrize(
+    "raw_data, expected",
+    [
+        (EXAMPLE_DATA, (2, 2)),
+        (EXAMPLE_DATA_TASK_2, (8, 4)),
+        ("", (0, 0))
+    ]
+)
+def test_count_valid_passports_numpy(raw_data, expected):
+    assert count_valid_passports(iter_passports(raw_data), use_numpy=True) == expected
+
+
+@pytest.mark.parametrize(
+    "raw_data",
+    [
+        EXAMPLE_DATA_TASK_2,
+        EXAMPLE_DATA.replace("\n", "\r\n"),
+        EXAMPLE_DATA.replace("\n\n", "\n  \n\n"),
+        "",
+        "byr:1937"
+    ]
+)
+@pytest.mark.parametrize("num_chunks", [1, 2, 3, 50])
+def test_split_at_records_keeps_records_whole(raw_data, num_chunks):
+    buffer = raw_data.encode()
+    chunks = split_at_records(buffer, num_chunks)
+
+    assert len(chunks) <= num_chunks
+    assert b"".join(buffer[start:stop] for start, stop in chunks) == buffer
+
+    chunked = [p for start, stop in chunks for p in iter_passports(buffer[start:stop].decode())]
+    assert chunked == parse_passports(raw_data)
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_count_valid_passports_parallel(tmp_path, use_numpy):
+    input_file = tmp_path / "input.txt"
+    input_file.write_text("\n\n".join([EXAMPLE_DATA_TASK_2.strip()] * 20))
+
+    expected = count_valid_passports(iter_passports(input_file.read_text()))
+    assert count_valid_passports_parallel(input_file, workers=2, use_numpy=use_numpy) == expected
@@ -1,8 +1,22 @@
-import string
+import re
+
+import numpy as np
+
+YEAR_PATTERN = re.compile(r'[0-9]{4}')
+HEIGHT_PATTERN = re.compile(r'([0-9]+)(cm|in)')
+HAIR_COLOUR_PATTERN = re.compile(r'#[0-9a-f]{6}')
+PID_PATTERN = re.compile(r'[0-9]{9}')
+
+HEIGHT_RANGES = {
+    "cm": (150, 193),
+    "in": (59, 76),
+}
+
+EYE_COLOURS = frozenset(("amb", "blu", "brn", "gry", "grn", "hzl", "oth"))
 
 
 def validate_yr(x):
-    return len(x) == 4 and x.isnumeric()
+    return YEAR_PATTERN.fullmatch(x) is not None
 
 
 def validate_byr(x):
@@ -18,35 +32,23 @@ def validate_eyr(x):
 
 
 def validate_hgt(x):
-    # Assumes that the unit is either "in" or "cm" (and thus two chars)
-    x = x.strip()
-    if not (x.endswith('in') or x.endswith('cm')):
+    m = HEIGHT_PATTERN.fullmatch(x.strip())
+    if m is None:
         return False
-    unit = x[-2:]
-    val = int(x[:-2])
-    if unit == 'cm':
-        return 150 <= val <= 193
-    if unit == 'in':
-        return 59 <= val <= 76
-    raise ValueError(f"Invalid height format: {x}")
+    low, high = HEIGHT_RANGES[m[2]]
+    return low <= int(m[1]) <= high
 
 
 def validate_hcl(x):
-    if x[0] != '#':
-        return False
-    if len(x) != 7:
-        return False
-    valid_chars = string.ascii_lowercase[:6] + string.digits
-    return all(y in valid_chars for y in x[1:])
+    return HAIR_COLOUR_PATTERN.fullmatch(x) is not None
 
 
 def validate_ecl(x):
-    valid_values = ("amb", "blu", "brn", "gry", "grn", "hzl", "oth")
-    return x.strip() in valid_values
+    return x.strip() in EYE_COLOURS
 
 
 def validate_pid(x):
-    return len(x) == 9 and x.isnumeric()
+    return PID_PATTERN.fullmatch(x) is not None
 
 
 def validate_cid(x):
@@ -63,3 +65,124 @@ validators = {
     "pid": validate_pid,
     "cid": validate_cid,
 }
+
+
+def compile_plan(fields):
+    """
+    Look up the validator for each of the fields once, up front, and return a function that runs them over a
+    passport in order. It stops at the first field that's missing or invalid.
+
+    :param fields:  The fields a passport must have, and which must all be valid
+    :return:        Function taking a passport (anything with `.get(field)`) and returning True if it's valid
+    """
+    checks = tuple((f, validators[f]) for f in fields)
+
+    def validate(passport):
+        for field, check in checks:
+            value = passport.get(field)
+            if value is None or not check(value):
+                return False
+        return True
+
+    return validate
+
+
+# Vectorised versions of the rules above, each taking a column of values as a fixed-width bytes ('S') array and
+# returning a boolean array. They agree with the scalar validators for every (ASCII) value.
+
+def _as_matrix(column, min_width):
+    """
+    View a column as an (N, width) matrix of bytes, zero-padded out to at least `min_width` columns.
+    """
+    column = np.ascontiguousarray(column)
+    matrix = column.view(np.uint8).reshape(len(column), column.dtype.itemsize)
+    if matrix.shape[1] < min_width:
+        matrix = np.pad(matrix, ((0, 0), (0, min_width - matrix.shape[1])))
+    return matrix
+
+
+def _is_digit(matrix):
+    return (matrix >= ord('0')) & (matrix <= ord('9'))
+
+
+def _fixed_width_number(column, width):
+    """
+    :return: Whether each value is exactly `width` digits long, and its integer value (if it is)
+    """
+    matrix = _as_matrix(column, width)
+    is_number = (np.char.str_len(column) == width) & _is_digit(matrix[:, :width]).all(axis=1)
+    powers = 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    return is_number, (matrix[:, :width].astype(np.int64) - ord('0')) @ powers
+
+
+def validate_yr_column(column, low, high):
+    is_number, value = _fixed_width_number(column, 4)
+    return is_number & (low <= value) & (value <= high)
+
+
+def validate_byr_column(column):
+    return validate_yr_column(column, 1920, 2002)
+
+
+def validate_iyr_column(column):
+    return validate_yr_column(column, 2010, 2020)
+
+
+def validate_eyr_column(column):
+    return validate_yr_column(column, 2020, 2030)
+
+
+def validate_hgt_column(column):
+    lengths = np.char.str_len(column).astype(np.int64)
+    matrix = _as_matrix(column, 3)
+    rows = np.arange(len(matrix))
+    unit = matrix[rows, np.maximum(lengths - 2, 0)].astype(np.int64) << 8 | matrix[rows, np.maximum(lengths - 1, 0)]
+
+    # Everything before the unit has to be a digit - and there has to be at least one of them
+    num_digits = lengths - 2
+    positions = np.arange(matrix.shape[1])
+    digit_positions = positions < num_digits[:, None]
+    is_number = (num_digits > 0) & (_is_digit(matrix) | ~digit_positions).all(axis=1)
+
+    # Floats, so that silly long numbers still compare correctly against the ranges
+    exponents = (num_digits[:, None] - 1 - positions).clip(min=0)
+    digits = np.where(digit_positions, matrix.astype(np.float64) - ord('0'), 0)
+    value = (digits * 10.0 ** exponents).sum(axis=1)
+
+    valid = np.zeros(len(column), dtype=bool)
+    for unit_str, (low, high) in HEIGHT_RANGES.items():
+        unit_code = ord(unit_str[0]) << 8 | ord(unit_str[1])
+        valid |= (unit == unit_code) & (low <= value) & (value <= high)
+    return is_number & valid
+
+
+def validate_hcl_column(column):
+    matrix = _as_matrix(column, 7)
+    hex_digits = matrix[:, 1:7]
+    is_hex = _is_digit(hex_digits) | ((hex_digits >= ord('a')) & (hex_digits <= ord('f')))
+    return (np.char.str_len(column) == 7) & (matrix[:, 0] == ord('#')) & is_hex.all(axis=1)
+
+
+def validate_ecl_column(column):
+    return np.isin(np.char.strip(column), [c.encode() for c in EYE_COLOURS])
+
+
+def validate_pid_column(column):
+    is_number, _ = _fixed_width_number(column, 9)
+    return is_number
+
+
+def validate_cid_column(column):
+    return np.ones(len(column), dtype=bool)
+
+
+column_validators = {
+    'byr': validate_byr_column,
+    "iyr": validate_iyr_column,
+    "eyr": validate_eyr_column,
+    "hgt": validate_hgt_column,
+    "hcl": validate_hcl_column,
+    "ecl": validate_ecl_column,
+    "pid": validate_pid_column,
+    "cid": validate_cid_column,
+}
@@ -1,11 +1,38 @@
 import pathlib
+import re
 import sys
 
+import numpy as np
+
 sys.path.append(str(pathlib.Path(__file__).parent.parent))
 import utils
 
 INPUT_URL = 'https://adventofcode.com/2020/day/5/input'
 
+# Back/Right are the upper halves (1s), Front/Left are the lower halves (0s)
+PASS_TO_BINARY = str.maketrans("FBLR", "0101")
+PASS_BYTES_TO_BINARY = bytes.maketrans(b"FBLR", b"0101")
+
+PASS_PATTERN = re.compile(rb'[FBLR]+')
+
+# Bytes of the input to split into passes at once in `iter_pass_ids`
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+PASS_LENGTH = 10
+NUM_SEATS = 128 * 8
+PASS_BIT_VALUES = 2 ** np.arange(PASS_LENGTH - 1, -1, -1)
+PASS_CHARS = np.frombuffer(b'FBLR', dtype=np.uint8)
+
+
+def _pass_str(seat_id):
+    bits = f"{seat_id:010b}"
+    return bits[:7].translate(str.maketrans("01", "FB")) + bits[7:].translate(str.maketrans("01", "LR"))
+
+
+# There are only 1024 possible passes, so just look every one of them up
+PASS_IDS = {_pass_str(seat_id): seat_id for seat_id in range(NUM_SEATS)}
+PASS_BYTES_IDS = {p.encode(): seat_id for p, seat_id in PASS_IDS.items()}
+
 
 def bsp_to_int(encoding):
     """
@@ -18,11 +45,8 @@ def bsp_to_int(encoding):
     :return:         The integer representation of that string.
     """
     pos = 0
-    for i, e in enumerate(encoding):
-        # Optimisation - we don't need to do anything if e == 0
-        if e == 0:
-            continue
-        pos += 2 ** (len(encoding) - 1 - i) * e
+    for e in encoding:
+        pos = pos * 2 + e
     return pos
 
 
@@ -56,65 +80,146 @@ def coord_to_id(row, col):
 
 def parse_pass_to_id(pass_str):
     """
-    Glue the pieces above together. Take a single boarding pass string, encode it
-    to a list of 1s and 0s for both rows and cols, then convert that to an integer
-    and use to generate the seat ID.
+    Glue the pieces above together, without actually building the pieces. Row * 8 + col
+    is just the row's bits followed by the column's 3 bits, so the seat ID is the whole
+    pass read as a single 10-bit binary number. There are only 1024 of those, so every
+    pass is looked up in a table of them all. Anything else is translated to binary
+    digits and parsed by `int`.
 
     :param pass_str: A boarding pass string in the format [BF]{7}[LR]{3}
     :return:         The ID of the seat (row * 8 + col)
     """
-    row_enc, col_enc = encode_pass_str(pass_str)
-    row_num = bsp_to_int(row_enc)
-    col_num = bsp_to_int(col_enc)
-    seat_id = coord_to_id(row_num, col_num)
-    return seat_id
+    try:
+        return PASS_IDS[pass_str]
+    except KeyError:
+        return int(pass_str.translate(PASS_TO_BINARY), 2)
+
+
+def _chunk_pass_ids(chunk):
+    try:
+        return list(map(PASS_BYTES_IDS.__getitem__, bytes(chunk).split()))
+    except KeyError:
+        return [int(m[0].translate(PASS_BYTES_TO_BINARY), 2) for m in PASS_PATTERN.finditer(chunk)]
+
+
+def iter_pass_ids(input_data, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Batch version of `parse_pass_to_id`, working on the raw bytes of the input. The
+    buffer is cut into chunks at line breaks, each chunk is split into passes and they're
+    all looked up in the table at once. If a chunk has anything other than whole passes
+    in it, the passes are picked out of it one at a time instead.
+
+    :param input_data:  The input, as a string, bytes-like buffer or `MappedInput`
+    :param chunk_size:  Roughly how many bytes to split at once, which bounds the memory used
+    :return:            Generator over the seat IDs
+    """
+    with utils.input_buffer(input_data) as buffer:
+        start = 0
+        while start < len(buffer):
+            stop = buffer.find(b"\n", start + chunk_size) + 1 or len(buffer)
+            yield from _chunk_pass_ids(buffer[start:stop])
+            start = stop
+
+
+def _seat_ids_from_buffer(buffer):
+    passes = utils.fixed_width_rows(buffer)
+    if passes is not None and passes.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    if passes is None or passes.shape[1] != PASS_LENGTH or not np.isin(passes, PASS_CHARS).all():
+        return np.fromiter(iter_pass_ids(buffer), dtype=np.int64)
+
+    # Of F, B, L and R, only B and R have bit 2 clear - so that's one comparison for all the 1s
+    is_one = (passes & 4) == 0
+    return is_one.astype(np.int64) @ PASS_BIT_VALUES
+
+
+def seat_ids_np(input_data):
+    """
+    Vectorised version of `iter_pass_ids`. If every line is a 10 character pass, the
+    input is viewed in place as an (N, 10) matrix of bytes (see `utils.fixed_width_rows`)
+    - stepping over the line ending at the end of each row - then all the IDs come out of one comparison and one dot
+    product with the value of each bit. Any other layout falls back to `iter_pass_ids`.
+
+    :param input_data:  The input, as a string, bytes-like buffer or `MappedInput`
+    :return:            Array of the seat IDs
+    """
+    with utils.input_buffer(input_data) as buffer:
+        return _seat_ids_from_buffer(buffer)
+
+
+def occupancy_bitmap(seat_ids):
+    """
+    Mark each seat ID in a bitmap of the whole plane - one bit per seat, so 128 bytes.
+    The IDs can be streamed in (e.g. from `iter_pass_ids`), or given as an array (from
+    `seat_ids_np`), in which case they're all marked at once.
+
+    :param seat_ids:    Iterable or array of seat IDs
+    :return:            The bitmap, as a bytearray (seat 0 is the top bit of byte 0)
+    """
+    if isinstance(seat_ids, np.ndarray):
+        occupied = np.zeros(NUM_SEATS, dtype=bool)
+        occupied[seat_ids] = True
+        return bytearray(np.packbits(occupied).tobytes())
+
+    bitmap = bytearray(NUM_SEATS // 8)
+    for seat_id in seat_ids:
+        bitmap[seat_id >> 3] |= 0x80 >> (seat_id & 7)
+    return bitmap
+
+
+def find_seats(seat_ids):
+    """
+    Answer both tasks from a single pass over the seat IDs, without sorting them.
+
+    Build the occupancy bitmap, then scan the (fixed) 1024 seats: the highest ID is
+    the last occupied seat, and ours is the empty seat with both neighbours occupied.
+
+    :param seat_ids:    Iterable or array of seat IDs
+    :return:            The highest seat ID (None if there are no seats), and the missing seat ID
+    """
+    bitmap = occupancy_bitmap(seat_ids)
+    occupied = [bool(bitmap[s >> 3] & (0x80 >> (s & 7))) for s in range(NUM_SEATS)]
+
+    max_id = max((s for s in range(NUM_SEATS) if occupied[s]), default=None)
+    missing = [s for s in range(1, NUM_SEATS - 1) if occupied[s - 1] and occupied[s + 1] and not occupied[s]]
+
+    assert len(missing) == 1, "There should be exactly one empty seat!"
+
+    return max_id, missing[0]
 
 
 def task_1(input_data):
     """
-    Split the input data on newlines, strip it and then parse it.
-    By doing this in a list comprehension, we get a list of all IDs, then it's a simple
-    case of calling `max` on the list.
+    Decode every pass in the input with `seat_ids_np`, then it's a simple case of
+    taking the `max` of the ID array.
 
     :param input_data:  The raw input string from the task data
-    :return:            The missing seat ID.
+    :return:            The highest seat ID.
     """
-    seat_ids = [parse_pass_to_id(l.strip()) for l in input_data.split("\n") if l.strip() != ""]
-    max_id = max(seat_ids)
+    max_id = int(seat_ids_np(input_data).max())
     return max_id
 
 
 def task_2(input_data):
     """
     Here, we'll take advantage of the fact that our (missing) seat ID is definitely
-    in between two existing IDs. If we sort all the seat IDs, the difference between
-    any consecutive pair of IDs should be exactly 1. If it's larger, it's our seat.
+    in between two existing IDs. Mark all the seats on the occupancy bitmap, and ours
+    is the one that's empty, but has both neighbours filled (see `find_seats`).
 
     :param input_data:  The raw input string from the task data
     :return:            The missing seat ID.
     """
-    seat_ids = [parse_pass_to_id(l.strip()) for l in input_data.split("\n") if l.strip() != ""]
-    seat_ids.sort()
-
-    # We'll find the gap by looking at the differences between all consecutive seat
-    # ids. If the diff is > 1, it's probably our seat
-    id_diffs = (seat_ids[i + 1] - seat_ids[i] for i in range(len(seat_ids) - 1))
-    missing_idxs = [i for i, d in enumerate(id_diffs) if d > 1]
-
-    assert len(missing_idxs) == 1, "There should be exactly one empty seat!"
-
-    # By now, we've found the index to the seat ID before the missing one, in the
-    # sorted list. The missing one should be `seat[idx] + 1`
-    return seat_ids[missing_idxs[0]] + 1
+    _, my_seat = find_seats(seat_ids_np(input_data))
+    return my_seat
 
 
 if __name__ == "__main__":
-    input_data = utils.load_input_data("cached_input.txt", INPUT_URL, '../session_cookie.txt')
+    input_data = utils.map_input_data("cached_input.txt", INPUT_URL, '../session_cookie.txt')
+
+    max_id, my_seat = find_seats(iter_pass_ids(input_data))
 
     print("Task 1:")
-    max_id = task_1(input_data)
     print(f"The highest ID is {max_id}")
 
     print("Task 2:")
-    my_seat = task_2(input_data)
     print(f"My seat ID is {my_seat}")
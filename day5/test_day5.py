@@ -1,10 +1,19 @@
+import mock
+import numpy as np
 import pytest
 
 from day5 import (
     bsp_to_int,
     encode_pass_str,
     coord_to_id,
-    parse_pass_to_id
+    PASS_IDS,
+    parse_pass_to_id,
+    iter_pass_ids,
+    seat_ids_np,
+    occupancy_bitmap,
+    find_seats,
+    task_1,
+    task_2
 )
 
 
@@ -64,3 +73,96 @@ def test_pass_encoder(boarding_pass, true_row_enc, true_col_enc):
 def test_pass_encoder(boarding_pass, expected_id):
     seat_id = parse_pass_to_id(boarding_pass)
     assert seat_id == expected_id
+
+
+@pytest.mark.parametrize(
+    "raw_data",
+    [
+        "BFFFBBFRRR\nFFFBBBFRRR\nBBFFBBFRLL\n",
+        "BFFFBBFRRR\r\nFFFBBBFRRR\r\n\nBBFFBBFRLL",
+        b"BFFFBBFRRR\nFFFBBBFRRR\nBBFFBBFRLL"
+    ]
+)
+def test_iter_pass_ids(raw_data):
+    assert list(iter_pass_ids(raw_data)) == [567, 119, 820]
+    assert list(seat_ids_np(raw_data)) == [567, 119, 820]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 12, 1 << 20])
+def test_iter_pass_ids_chunks(chunk_size):
+    raw_data = "BFFFBBFRRR\nFFFBBBFRRR\r\n\nBBFFBBFRLL\n"
+    assert list(iter_pass_ids(raw_data, chunk_size)) == [567, 119, 820]
+    assert list(iter_pass_ids(bytearray(raw_data.encode()), chunk_size)) == [567, 119, 820]
+
+
+def test_iter_pass_ids_irregular_passes():
+    # Not a whole pass per token, so these are picked out one at a time
+    assert list(iter_pass_ids("BFFFBBFRRR,FFFBBBFRRR\nBBFFBBFRLL x")) == [567, 119, 820]
+    assert list(iter_pass_ids("FBF\nBFFFBBFRRR")) == [2, 567]
+
+
+def test_pass_table():
+    assert len(PASS_IDS) == 1024
+    assert all(parse_pass_to_id(p) == bsp_to_int(sum(encode_pass_str(p), [])) for p in PASS_IDS)
+    assert parse_pass_to_id("FBF") == 2
+
+
+def seat_pass(seat_id):
+    """
+    The boarding pass for a seat ID: the row's 7 bits as F/B, then the column's 3 bits as L/R.
+    """
+    bits = f"{seat_id:010b}"
+    return bits[:7].translate(str.maketrans("01", "FB")) + bits[7:].translate(str.maketrans("01", "LR"))
+
+
+def test_seat_ids_np_all_seats():
+    raw_data = "\n".join(seat_pass(s) for s in range(1024))
+    assert list(seat_ids_np(raw_data)) == list(range(1024))
+    assert list(seat_ids_np(raw_data.replace("\n", "\r\n"))) == list(range(1024))
+    assert len(seat_ids_np("")) == 0
+
+
+@pytest.mark.parametrize("line_ending", ["\n", "\r\n"])
+def test_seat_ids_np_uses_strided_view(line_ending):
+    raw_data = line_ending.join(["BFFFBBFRRR", "FFFBBBFRRR", "BBFFBBFRLL"]) + line_ending
+    with mock.patch("day5.iter_pass_ids") as iter_pass_ids_mock:
+        assert list(seat_ids_np(raw_data)) == [567, 119, 820]
+    iter_pass_ids_mock.assert_not_called()
+
+
+def test_tasks():
+    # Every seat from 3 to 12, apart from 9
+    seats = [s for s in range(3, 13) if s != 9]
+    passes = [seat_pass(s) for s in seats]
+    assert [bsp_to_int(sum(encode_pass_str(p), [])) for p in passes] == seats
+    raw_data = "\n".join(passes)
+
+    assert task_1(raw_data) == 12
+    assert task_2(raw_data) == 9
+
+
+def test_occupancy_bitmap():
+    bitmap = occupancy_bitmap([0, 9, 1023])
+    assert len(bitmap) == 128
+    assert bitmap[0] == 0x80
+    assert bitmap[1] == 0x40
+    assert bitmap[127] == 0x01
+    assert occupancy_bitmap(np.array([0, 9, 1023])) == bitmap
+
+
+@pytest.mark.parametrize(
+    "seat_ids, expected",
+    [
+        ([s for s in range(3, 13) if s != 9], (12, 9)),
+        ([s for s in range(40, 1000) if s != 500], (999, 500)),
+        ([1, 3], (3, 2)),
+    ]
+)
+def test_find_seats(seat_ids, expected):
+    assert find_seats(iter(seat_ids)) == expected
+    assert find_seats(np.array(seat_ids)) == expected
+
+
+def test_find_seats_needs_one_gap():
+    with pytest.raises(AssertionError):
+        find_seats(iter([1, 3, 5]))
@@ -1,12 +1,33 @@
 import enum
 import pathlib
+import string
 import sys
 
+import numpy as np
+
 sys.path.append(str(pathlib.Path(__file__).parent.parent))
 import utils
 
 INPUT_URL = 'https://adventofcode.com/2020/day/6/input'
 
+LETTER_BITS = {c: 1 << i for i, c in enumerate(string.ascii_lowercase)}
+
+# The same letter bits, as a lookup table from byte value. Whitespace maps to no bits at all.
+BYTE_BITS = np.zeros(256, dtype=np.uint32)
+BYTE_BITS[[ord(c) for c in LETTER_BITS]] = list(LETTER_BITS.values())
+VALID_BYTES = BYTE_BITS != 0
+VALID_BYTES[[ord(c) for c in " \t\r\n"]] = True
+
+
+def answers_to_mask(answers):
+    """
+    Encode a set of answers as a 26-bit integer, with bit i set if the ith letter was answered.
+    """
+    mask = 0
+    for c in answers:
+        mask |= LETTER_BITS[c]
+    return mask
+
 
 class GroupInputParser:
     class Mode(enum.Enum):
@@ -19,25 +40,25 @@ class GroupInputParser:
         self.mode = mode
 
     def parse(self, raw_data):
-        lines = raw_data.split("\n")
-        for line in lines:
+        for line in utils.iter_lines(raw_data):
             if line.strip() == "":
                 self._complete_group()
                 continue
-            line_set = set(line.strip())
-
-            if self.current_group is None:
-                self.current_group = line_set
-            elif self.mode == GroupInputParser.Mode.INTERSECT:
-                self.current_group.intersection_update(line_set)
-            else:
-                self.current_group = self.current_group.union(line_set)
+            self._add_answers(answers_to_mask(line.strip()))
 
         self._complete_group()
         return self.groups
 
+    def _add_answers(self, answers):
+        if self.current_group is None:
+            self.current_group = answers
+        elif self.mode == GroupInputParser.Mode.INTERSECT:
+            self.current_group &= answers
+        else:
+            self.current_group |= answers
+
     def _complete_group(self):
-        if self.current_group is not None and len(self.current_group) > 0:
+        if self.current_group:
             self.groups.append(self.current_group)
         self._reset_current()
 
@@ -48,7 +69,92 @@ class GroupInputParser:
 def calculate_sum_counts(data, parse_mode):
     parser = GroupInputParser(parse_mode)
     groups = parser.parse(data)
-    return sum(map(len, groups))
+    return sum(g.bit_count() for g in groups)
+
+
+def calculate_totals(data):
+    """
+    Streaming alternative to running `calculate_sum_counts` once per mode. Keep a running
+    union and intersection for the current group, and add their counts to the totals as
+    each group ends - so only the two totals are kept, never a list of groups.
+
+    :param data: The input, as anything `utils.iter_lines` accepts (e.g. a line iterator)
+    :return: The sums of the counts per group for the UNION and INTERSECT modes
+    """
+    union_total = 0
+    intersect_total = 0
+    union = intersect = None
+
+    for line in utils.iter_lines(data):
+        answers = line.strip()
+        if answers == "":
+            if union is not None:
+                union_total += union.bit_count()
+                intersect_total += intersect.bit_count()
+                union = intersect = None
+            continue
+
+        mask = answers_to_mask(answers)
+        if union is None:
+            union = intersect = mask
+        else:
+            union |= mask
+            intersect &= mask
+
+    if union is not None:
+        union_total += union.bit_count()
+        intersect_total += intersect.bit_count()
+
+    return union_total, intersect_total
+
+
+def _popcount(masks):
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(masks)
+    return np.unpackbits(masks.view(np.uint8)).reshape(len(masks), -1).sum(axis=1)
+
+
+def _totals_from_buffer(buffer):
+    raw = np.frombuffer(buffer, dtype=np.uint8)
+    if not VALID_BYTES[raw].all():
+        raise ValueError("Answers should only contain the letters a-z")
+
+    # Every line's segment runs up to (and including) its newline, which contributes no
+    # bits. The extra zero on the end stands in for the newline after the last line, so
+    # no segment is ever empty.
+    bits = np.append(BYTE_BITS[raw], np.uint32(0))
+    line_starts = np.concatenate(([0], np.flatnonzero(raw == ord("\n")) + 1))
+    line_masks = np.bitwise_or.reduceat(bits, line_starts)
+
+    is_blank = line_masks == 0
+    answered = np.flatnonzero(~is_blank)
+    if len(answered) == 0:
+        return 0, 0
+
+    # A group starts on any non-blank line straight after a blank one (or at the start)
+    follows_blank = np.concatenate(([True], is_blank[:-1]))[answered]
+    group_starts = np.flatnonzero(follows_blank)
+
+    masks = line_masks[answered]
+    union = np.bitwise_or.reduceat(masks, group_starts)
+    intersect = np.bitwise_and.reduceat(masks, group_starts)
+    return int(_popcount(union).sum()), int(_popcount(intersect).sum())
+
+
+def calculate_totals_np(data):
+    """
+    Vectorised version of `calculate_totals` over the raw bytes of the input.
+
+    Each byte is looked up in a table of letter bits, and each line's mask is the OR of
+    its bytes (`np.bitwise_or.reduceat` over the line boundaries). Blank lines come out
+    as empty masks, which gives us the group boundaries, and then each group's union and
+    intersection is one more `reduceat` over its lines.
+
+    :param data: The input, as a string, bytes-like buffer or `MappedInput`
+    :return: The sums of the counts per group for the UNION and INTERSECT modes
+    """
+    with utils.input_buffer(data) as buffer:
+        return _totals_from_buffer(buffer)
 
 
 def task_1(data):
@@ -62,11 +168,13 @@ def task_2(data):
 
 
 if __name__ == "__main__":
-    input_data = utils.load_input_data("cached_input.txt", INPUT_URL, '../session_cookie.txt')
+    input_data = utils.map_input_data("cached_input.txt", INPUT_URL, '../session_cookie.txt')
+
+    union_total, intersect_total = calculate_totals(input_data)
 
     print("Task 1:")
-    task_1(input_data)
+    print(f"The sum of all questions per group is {union_total}")
 
     print("")
     print("Task 2:")
-    task_2(input_data)
+    print(f"The sum of all questions per group is {intersect_total}")
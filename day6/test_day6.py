@@ -1,10 +1,16 @@
+import random
+
 import mock
 import pytest
 
 from day6 import (
     GroupInputParser,
-    calculate_sum_counts
+    answers_to_mask,
+    calculate_sum_counts,
+    calculate_totals,
+    calculate_totals_np
 )
+import utils
 
 RAW_INPUT = """abc
 
@@ -54,7 +60,20 @@ def test_parser_correct_groupings(raw_data, intersect, expected_groups):
     assert len(groups) == len(expected_groups)
 
     for i, e in enumerate(expected_groups):
-        assert set(e) == groups[i]
+        assert answers_to_mask(e) == groups[i]
+
+
+@pytest.mark.parametrize(
+    'answers, expected_mask',
+    [
+        ("", 0),
+        ("a", 0b1),
+        ("cab", 0b111),
+        ("aaz", (1 << 25) | 1)
+    ]
+)
+def test_answers_to_mask(answers, expected_mask):
+    assert answers_to_mask(answers) == expected_mask
 
 
 @pytest.mark.parametrize(
@@ -77,3 +96,43 @@ def test_integration_sum_groups(raw_data, intersect, expected_sum):
     mode = GroupInputParser.Mode.INTERSECT if intersect else GroupInputParser.Mode.UNION
     total = calculate_sum_counts(raw_data, mode)
     assert total == expected_sum
+
+
+@pytest.mark.parametrize(
+    'raw_data',
+    [
+        RAW_INPUT,
+        "a\n\n \n\n\nabc\nd\n\ndef",
+        "a\nb\n ab  \n\nabc\nd\n\ndef",
+        "a\nb\nc\n\n\nabc\nd\n\n\n",
+        ""
+    ]
+)
+def test_calculate_totals_matches_per_mode_sums(raw_data):
+    expected = (
+        calculate_sum_counts(raw_data, GroupInputParser.Mode.UNION),
+        calculate_sum_counts(raw_data, GroupInputParser.Mode.INTERSECT)
+    )
+    assert calculate_totals(raw_data) == expected
+    assert calculate_totals(iter(raw_data.splitlines())) == expected
+    assert calculate_totals_np(raw_data) == expected
+    assert calculate_totals_np(raw_data.replace("\n", "\r\n")) == expected
+
+
+def test_calculate_totals_np_invalid_answers(tmp_path):
+    with pytest.raises(ValueError):
+        calculate_totals_np("abc\nA\n")
+
+    # The mapped file still has views onto it when the error is raised, which mustn't hide it
+    path = tmp_path / "input.txt"
+    path.write_bytes(b"abc\nA\n")
+    with pytest.raises(ValueError):
+        calculate_totals_np(utils.MappedInput(path))
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_calculate_totals_np_random(seed):
+    rng = random.Random(seed)
+    lines = ["".join(rng.sample("abcdefghijklmnopqrstuvwxyz", rng.randint(0, 6))) for _ in range(500)]
+    raw_data = "\n".join(lines)
+    assert calculate_totals_np(raw_data) == calculate_totals(raw_data)
@@ -1,6 +1,9 @@
 import pathlib
 import re
 import sys
+from array import array
+from collections import deque
+from functools import cached_property
 
 sys.path.append(str(pathlib.Path(__file__).parent.parent))
 import utils
@@ -8,15 +11,177 @@ import utils
 INPUT_URL = 'https://adventofcode.com/2020/day/7/input'
 
 
+class CyclicBagRulesException(Exception):
+    def __init__(self, bag):
+        super().__init__(f"The rules for {bag} bags are cyclic - they'd hold infinitely many bags")
+        self.bag = bag
+
+
+class BagGraph:
+    """
+    Compact form of the bag rules. Each bag name is interned to a dense integer ID (its
+    index in `names`), and the edges are stored in CSR form: the contents of bag `i` are
+    `targets[offsets[i]:offsets[i + 1]]`, with the matching `counts`. The reverse edges
+    (which bags directly contain each bag) are stored the same way, in `container_offsets`
+    and `containers`.
+
+    The number of bags in each bag is worked out for every bag together, the first time
+    it's needed, and cached (see `bag_totals`).
+    """
+
+    def __init__(self, names, offsets, targets, counts):
+        self.names = names
+        self.ids = {name: i for i, name in enumerate(names)}
+        self.offsets = offsets
+        self.targets = targets
+        self.counts = counts
+        self.container_offsets, self.containers = _reverse_edges(len(names), offsets, targets)
+
+    @classmethod
+    def from_rules(cls, rules):
+        """
+        :param rules: Iterable of (bag, contents) pairs, as produced by `naive_parser`
+        :return: The `BagGraph` of the rules
+        """
+        names = []
+        ids = {}
+
+        def intern(name):
+            if name not in ids:
+                ids[name] = len(names)
+                names.append(name)
+            return ids[name]
+
+        sources = array('L')
+        targets = array('L')
+        counts = array('L')
+        for outer, contents in rules:
+            outer_id = intern(outer)
+            for item in contents:
+                if item is not None:
+                    sources.append(outer_id)
+                    targets.append(intern(item[1]))
+                    counts.append(item[0])
+
+        offsets, order = _group_edges(len(names), sources)
+        return cls(names, offsets, array('L', (targets[e] for e in order)), array('L', (counts[e] for e in order)))
+
+    @classmethod
+    def from_LUT(cls, data):
+        return cls.from_rules(data.items())
+
+    def contents(self, bag_id):
+        start, stop = self.offsets[bag_id], self.offsets[bag_id + 1]
+        return zip(self.counts[start:stop], self.targets[start:stop])
+
+    def containers_of(self, bag_id):
+        return self.containers[self.container_offsets[bag_id]:self.container_offsets[bag_id + 1]]
+
+    @cached_property
+    def bag_totals(self):
+        """
+        The total number of bags that make up every bag (itself, plus everything inside
+        it), worked out in a single pass with no recursion.
+
+        We go in reverse topological order: start from the bags that contain nothing, and
+        once every bag inside a container has its total, the container's total is
+        1 + sum(count * total) over its contents. The reverse edges tell us which
+        containers to check off as each bag is finished.
+
+        Any bag that never gets finished is part of (or contains) a cycle, and is left as None.
+
+        :return: List of the total for each bag ID
+        """
+        num_unfinished = [self.offsets[i + 1] - self.offsets[i] for i in range(len(self.names))]
+        ready = deque(i for i, num in enumerate(num_unfinished) if num == 0)
+
+        totals = [None] * len(self.names)
+        while ready:
+            bag_id = ready.popleft()
+            totals[bag_id] = 1 + sum(count * totals[in_id] for count, in_id in self.contents(bag_id))
+
+            for outer_id in self.containers_of(bag_id):
+                num_unfinished[outer_id] -= 1
+                if num_unfinished[outer_id] == 0:
+                    ready.append(outer_id)
+
+        return totals
+
+
+class BagRules(dict):
+    """
+    The LUT of bags to their contents, which also carries the `BagGraph` of the same rules.
+    The graph is built the first time it's needed and cached, so the traversals can be
+    handed the LUT over and over without converting it each time. That means the rules
+    shouldn't be changed once the LUT has been searched.
+    """
+
+    @cached_property
+    def graph(self):
+        return BagGraph.from_LUT(self)
+
+
+def _group_edges(num_nodes, sources):
+    """
+    Counting sort of the edges by their source node.
+
+    :return: The CSR offsets for each node, and the order in which to lay the edges out
+    """
+    offsets = array('Q', bytes(8 * (num_nodes + 1)))
+    for s in sources:
+        offsets[s + 1] += 1
+    for i in range(num_nodes):
+        offsets[i + 1] += offsets[i]
+
+    order = array('Q', bytes(8 * len(sources)))
+    next_slot = array('Q', offsets[:-1])
+    for e, s in enumerate(sources):
+        order[next_slot[s]] = e
+        next_slot[s] += 1
+    return offsets, order
+
+
+def _reverse_edges(num_nodes, offsets, targets):
+    """
+    Flip the CSR edges round, so each bag points at the bags that directly contain it.
+    """
+    sources = array('L', (i for i in range(num_nodes) for _ in range(offsets[i + 1] - offsets[i])))
+    container_offsets, order = _group_edges(num_nodes, targets)
+    return container_offsets, array('L', (sources[e] for e in order))
+
+
+def _as_graph(data):
+    """
+    The traversals run on a `BagGraph`. A LUT from `create_LUT` carries its own, but a plain
+    dict has nowhere to keep one, so it has to be converted afresh on every call - build the
+    graph once with `create_graph` (or `create_LUT`) for repeated lookups.
+    """
+    if isinstance(data, BagGraph):
+        return data
+    if isinstance(data, BagRules):
+        return data.graph
+    return BagGraph.from_LUT(data)
+
+
 def create_LUT(raw_data):
     """
-    Using the parsers above, convert the list of key/content tuples to a lookup dictionary we
+    Using the parsers below, convert the list of key/content tuples to a lookup dictionary we
     can use for tree navigation.
 
     :param raw_data: The newline-delimited string containing all the data.
-    :return: A LUT (dictionary) of (adj_1, adj_2) -> [(num, (adj_1, adj_2))]
+    :return: A LUT (`BagRules` dictionary) of (adj_1, adj_2) -> [(num, (adj_1, adj_2))]
     """
-    return dict(naive_parser(line) for line in raw_data.split("\n") if line.strip() != "")
+    return BagRules(naive_parser(line) for line in utils.iter_lines(raw_data) if line.strip() != "")
+
+
+def create_graph(raw_data):
+    """
+    Parse the rules straight into a `BagGraph`, without building the LUT first.
+
+    :param raw_data: The newline-delimited string containing all the data.
+    :return: The `BagGraph` of the rules
+    """
+    return BagGraph.from_rules(naive_parser(line) for line in utils.iter_lines(raw_data) if line.strip() != "")
 
 
 def extract_count_and_tag(item):
@@ -83,64 +248,70 @@ def naive_parser(line):
 
 def find_containers(data, key):
     """
-    Data is a lookup table of outer bags to their contents (weighted edges).
+    Data is the graph of bags to their contents (weighted edges).
 
-    We'll search the LUT to find the bags that can contain `key`, then recursively
-    search through the LUT until there are no containers for the current key.
+    Starting from `key`, we do a breadth-first search up through the reverse edges: each
+    bag that directly contains the current one is added to the set of discovered
+    containers and queued up, unless we've already seen it. Every bag and edge is visited
+    at most once.
 
-    As we pass through a container, we'll add it to the set of discovered containers.
-
-    :param data: The LUT of bags to contents
+    :param data: The `BagGraph`, or a LUT of bags to contents (see `_as_graph`)
     :param key: The bag to search for
     :return: A set containing all the containers that we pass through while lookign for key.
     """
+    graph = _as_graph(data)
+    if key not in graph.ids:
+        return set()
 
-    containers = set()
+    seen = bytearray(len(graph.names))
+    queue = deque([graph.ids[key]])
+    while queue:
+        for outer_id in graph.containers_of(queue.popleft()):
+            if not seen[outer_id]:
+                seen[outer_id] = 1
+                queue.append(outer_id)
+    return {graph.names[i] for i, s in enumerate(seen) if s}
 
-    for outer, contents in data.items():
-        if contents[0] is None:
-            continue
 
-        content_bag_types = [x[1] for x in contents]
-        if key in content_bag_types:
-            containers.add(outer)
+def count_all_bags(data):
+    """
+    The total number of bags that make up every bag (itself, plus everything inside it) -
+    see `BagGraph.bag_totals`. Bags that are part of (or contain) a cycle are left out.
 
-    for c in containers:
-        containers = containers.union(find_containers(data, c))
-    return containers
+    :param data: The `BagGraph`, or a LUT of bags to contents (see `_as_graph`)
+    :return: Dictionary of bag -> total number of bags, including itself
+    """
+    graph = _as_graph(data)
+    return {graph.names[i]: total for i, total in enumerate(graph.bag_totals) if total is not None}
 
 
 def find_internal_bags(data, key, top_level=False):
     """
-    Recursively navigate down through the graph from the target. For each new bag, retrieve the number
-    of bags inside it (recursive call) and then multiply by the number of this bag in the container.
+    Look up the number of bags inside the bag identified by `key`, from the totals for
+    every bag (see `BagGraph.bag_totals`), which are only worked out once per graph.
 
     Optional arg identifies the top-level call, which is used to remove the top-level container bag,
     which should not be counted.
 
-    :param data: The LUT of bags to contents
+    :param data: The `BagGraph`, or a LUT of bags to contents (see `_as_graph`)
     :param key: The bag to search for
-    :param offset: Optional flag which is used to reduce the total count by 1, defaults to False.
+    :param top_level: Optional flag which is used to reduce the total count by 1, defaults to False.
     :return: The sum of bags contained within the bag identified by `key`
     """
-    contains = [c for c in data[key] if c is not None]
-    if len(contains) == 0:
-        return 1
-
-    sum = 1
-    for count, in_key in contains:
-        num = find_internal_bags(data, in_key)
-        sum += count * num
+    graph = _as_graph(data)
+    total = graph.bag_totals[graph.ids[key]]
+    if total is None:
+        raise CyclicBagRulesException(key)
 
     offset = -1 if top_level else 0
-    return sum + offset
+    return total + offset
 
 
 def task_1(data):
     """
-    Get the LUT for the graph.
+    Build the graph of the rules.
 
-    Then perform a recursive path search through the graph to find the number of bags that can
+    Then search up through the reverse edges of the graph to find the number of bags that can
     contain the target.
 
     :param data: The full piece of data as a newline delimited string.
@@ -148,32 +319,32 @@ def task_1(data):
     """
     tgt = ("shiny", "gold")
 
-    lut = create_LUT(data)
-    path = find_containers(lut, tgt)
+    graph = create_graph(data)
+    path = find_containers(graph, tgt)
 
     print(f"There are {len(path)} bags that can contain a {' '.join(tgt)} bag.")
 
 
 def task_2(data):
     """
-    Get the LUT for the graph.
+    Build the graph of the rules.
 
-    Then perform a recursive search through the graph, accumulating the number of bags contained
-    within this one (and its children).
+    Then look up the number of bags contained within this one (and its children), from the
+    totals worked out for the whole graph.
 
     :param data: The full piece of data as a newline delimited string.
     :return: None
     """
     tgt = ("shiny", "gold")
 
-    lut = create_LUT(data)
-    total = find_internal_bags(lut, tgt, True)
+    graph = create_graph(data)
+    total = find_internal_bags(graph, tgt, True)
 
     print(f"You'll need {total} bags - good luck!.")
 
 
 if __name__ == "__main__":
-    input_data = utils.load_input_data("cached_input.txt", INPUT_URL, '../session_cookie.txt')
+    input_data = utils.map_input_data("cached_input.txt", INPUT_URL, '../session_cookie.txt')
 
     print("Task 1")
     task_1(input_data)
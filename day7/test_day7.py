@@ -1,6 +1,12 @@
 import pytest
 
 from day7 import (
+    BagGraph,
+    BagRules,
+    CyclicBagRulesException,
+    count_all_bags,
+    create_LUT,
+    create_graph,
     extract_count_and_tag,
     naive_parser,
     find_containers,
@@ -127,6 +133,61 @@ def test_find_container_set_example():
     assert len(path) == 4
 
 
+def test_create_graph():
+    graph = create_graph(EXAMPLE_DATA)
+    assert isinstance(graph, BagGraph)
+    assert len(graph.names) == 9
+    assert graph.ids == {name: i for i, name in enumerate(graph.names)}
+    assert list(graph.offsets) == sorted(graph.offsets)
+    assert graph.offsets[-1] == len(graph.targets) == len(graph.counts) == len(graph.containers) == 13
+
+    muted_yellow = graph.ids[("muted", "yellow")]
+    assert sorted((c, graph.names[t]) for c, t in graph.contents(muted_yellow)) == [
+        (2, ("shiny", "gold")), (9, ("faded", "blue"))
+    ]
+    assert list(graph.contents(graph.ids[("faded", "blue")])) == []
+
+    def containers(name):
+        return sorted(graph.names[i] for i in graph.containers_of(graph.ids[name]))
+
+    assert containers(("shiny", "gold")) == [("bright", "white"), ("muted", "yellow")]
+    assert containers(("faded", "blue")) == [("dark", "olive"), ("muted", "yellow"), ("vibrant", "plum")]
+    assert containers(("light", "red")) == []
+
+
+def test_create_graph_matches_LUT():
+    graph = create_graph(EXAMPLE_DATA)
+    from_lut = BagGraph.from_LUT(create_LUT(EXAMPLE_DATA))
+    assert graph.names == from_lut.names
+    assert graph.offsets == from_lut.offsets
+    assert graph.targets == from_lut.targets
+    assert graph.counts == from_lut.counts
+
+
+def test_create_LUT_carries_graph():
+    lut = create_LUT(EXAMPLE_DATA_TASK_2)
+    assert isinstance(lut, BagRules)
+    assert lut == dict(naive_parser(line) for line in EXAMPLE_DATA_TASK_2.split("\n") if line.strip() != "")
+
+    graph = lut.graph
+    assert graph.names == create_graph(EXAMPLE_DATA_TASK_2).names
+    assert find_internal_bags(lut, ("shiny", "gold"), True) == 126
+    assert find_containers(lut, ("dark", "blue")) == {
+        ("shiny", "gold"), ("dark", "red"), ("dark", "orange"), ("dark", "yellow"), ("dark", "green")
+    }
+    assert lut.graph is graph
+    assert "bag_totals" in vars(graph)
+
+
+def test_find_containers_graph():
+    graph = create_graph(EXAMPLE_DATA)
+    assert find_containers(graph, ("shiny", "gold")) == {
+        ("bright", "white"), ("muted", "yellow"), ("dark", "orange"), ("light", "red")
+    }
+    assert find_containers(graph, ("light", "red")) == set()
+    assert find_containers(graph, ("pale", "green")) == set()
+
+
 @pytest.mark.parametrize(
     "data, expected",
     [
@@ -139,3 +200,38 @@ def test_find_internal_bags_example(data, expected):
 
     edges = dict(naive_parser(line) for line in data.split("\n") if line.strip() != "")
     assert find_internal_bags(edges, tgt, True) == expected
+
+
+def test_count_all_bags_example():
+    graph = create_graph(EXAMPLE_DATA_TASK_2)
+    totals = count_all_bags(graph)
+    assert totals[("dark", "violet")] == 1
+    assert totals[("dark", "blue")] == 3
+    assert totals[("shiny", "gold")] == 127
+    assert graph.bag_totals == [totals[name] for name in graph.names]
+    assert count_all_bags(create_LUT(EXAMPLE_DATA_TASK_2)) == totals
+
+
+def test_find_internal_bags_diamond():
+    # Every layer holds two of each of the two bags in the next layer - 4^n paths to the bottom
+    lines = [f"layer{i} a bags contain 2 layer{i + 1} a bags, 2 layer{i + 1} b bags." for i in range(200)]
+    lines += [f"layer{i} b bags contain 2 layer{i + 1} a bags, 2 layer{i + 1} b bags." for i in range(200)]
+    lines += ["layer200 a bags contain no other bags.", "layer200 b bags contain no other bags."]
+    graph = create_graph("\n".join(lines))
+
+    assert find_internal_bags(graph, ("layer199", "a"), True) == 4
+    assert find_internal_bags(graph, ("layer0", "a"), True) == sum(4 ** i for i in range(1, 201))
+
+
+def test_find_internal_bags_cycle():
+    graph = create_graph("""shiny gold bags contain 1 dark red bag.
+dark red bags contain 2 dark blue bags.
+dark blue bags contain 1 dark red bag, 1 faded blue bag.
+faded blue bags contain no other bags.""")
+
+    assert find_internal_bags(graph, ("faded", "blue")) == 1
+    assert count_all_bags(graph) == {("faded", "blue"): 1}
+    with pytest.raises(CyclicBagRulesException):
+        find_internal_bags(graph, ("shiny", "gold"), True)
+    with pytest.raises(KeyError):
+        find_internal_bags(graph, ("light", "red"))
@@ -68,7 +68,7 @@ class HandHeld(object):
             "acc": self.acc,
             "jmp": self.jmp
         }
-        for line in raw_input.split("\n"):
+        for line in utils.iter_lines(raw_input):
             line = line.strip()
             if line == "":
                 continue
@@ -143,7 +143,7 @@ def task_2(data):
 
 
 if __name__ == "__main__":
-    input_data = utils.load_input_data("cached_input.txt", INPUT_URL, '../session_cookie.txt')
+    input_data = utils.map_input_data("cached_input.txt", INPUT_URL, '../session_cookie.txt')
 
     print("Task 1")
     task_1(input_data)
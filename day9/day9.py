@@ -188,6 +188,6 @@ def task_2(raw_data, target):
 
 
 if __name__ == "__main__":
-    input_data = utils.load_input_data("cached_input.txt", INPUT_URL, '../session_cookie.txt')
+    input_data = utils.map_input_data("cached_input.txt", INPUT_URL, '../session_cookie.txt')
     tgt = task_1(input_data, 25)
     task_2(input_data, tgt)
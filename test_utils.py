@@ -0,0 +1,144 @@
+import io
+import mmap
+
+import numpy as np
+import pytest
+
+from utils import (
+    MappedInput,
+    fixed_width_rows,
+    iter_lines,
+    iter_records,
+    parse_int_data
+)
+
+SAMPLES = [
+    "",
+    "\n",
+    "\n\n",
+    "one line",
+    "one line\n",
+    "first\nsecond\nthird",
+    "first\nsecond\nthird\n",
+    "first\n\n\nfourth\n\n",
+    "windows\r\nline endings\r\n",
+    "  padded  \n\t\n",
+    "unicode: éè\n☃",
+]
+
+
+@pytest.mark.parametrize("data", SAMPLES)
+def test_iter_lines_str(data):
+    assert list(iter_lines(data)) == data.split("\n")
+
+
+@pytest.mark.parametrize("data", SAMPLES)
+def test_iter_lines_bytes(data):
+    assert list(iter_lines(data.encode())) == data.split("\n")
+    assert list(iter_lines(bytearray(data.encode()))) == data.split("\n")
+
+
+@pytest.mark.parametrize("data", [s for s in SAMPLES if s != ""])
+def test_iter_lines_mmap(data, tmp_path):
+    path = tmp_path / "input.txt"
+    path.write_bytes(data.encode())
+
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        assert list(iter_lines(buffer)) == data.split("\n")
+
+
+@pytest.mark.parametrize("data", SAMPLES)
+def test_iter_lines_file(data):
+    assert list(iter_lines(io.StringIO(data, newline=""))) == data.split("\n")
+
+
+@pytest.mark.parametrize("data", SAMPLES)
+def test_mapped_input(data, tmp_path):
+    path = tmp_path / "input.txt"
+    path.write_bytes(data.encode())
+    mapped = MappedInput(path)
+
+    # Re-iterable, mapping the file afresh each time
+    assert list(iter_lines(mapped)) == data.split("\n")
+    assert list(mapped) == data.split("\n")
+
+
+def test_mapped_input_empty_file(tmp_path):
+    path = tmp_path / "input.txt"
+    path.write_bytes(b"")
+    mapped = MappedInput(path)
+
+    with mapped.open() as buffer:
+        assert buffer == b""
+    assert list(mapped) == [""]
+    assert list(mapped.records()) == []
+
+
+def test_mapped_input_error_with_live_views(tmp_path):
+    path = tmp_path / "input.txt"
+    path.write_bytes(b"abc\n")
+
+    with pytest.raises(KeyError):
+        with MappedInput(path).open() as buffer:
+            view = np.frombuffer(buffer, dtype=np.uint8)
+            raise KeyError(view[0])
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        ("", []),
+        ("\n\n\n", []),
+        ("a\nb", [["a", "b"]]),
+        ("a\nb\n\nc", [["a", "b"], ["c"]]),
+        ("\n\na\nb\n\nc", [["a", "b"], ["c"]]),
+        ("a\nb\n\nc\n\n\n", [["a", "b"], ["c"]]),
+        ("a\n\n\n\nb\n \t\nc\r\n", [["a"], ["b"], ["c\r"]]),
+    ]
+)
+def test_iter_records(data, expected, tmp_path):
+    assert list(iter_records(data)) == expected
+
+    path = tmp_path / "input.txt"
+    path.write_bytes(data.encode())
+    assert list(MappedInput(path).records()) == expected
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"abc\ndef\nghi\n",
+        b"abc\ndef\nghi",
+        b"abc\r\ndef\r\nghi\r\n",
+        b"abc\r\ndef\r\nghi",
+        b"\n\nabc\ndef\nghi\n\n\n",
+    ]
+)
+def test_fixed_width_rows(data):
+    rows = fixed_width_rows(data)
+    assert rows.shape == (3, 3)
+    assert [bytes(r) for r in rows] == [b"abc", b"def", b"ghi"]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"abc\nde\nghi\n",
+        b"abc\ndef\n\nghi\n",
+        b"abc\r\ndef\nghi\r\n",
+        b"abc\r\ndefg\nhi\r\n",
+    ]
+)
+def test_fixed_width_rows_irregular(data):
+    assert fixed_width_rows(data) is None
+
+
+def test_fixed_width_rows_edge_cases():
+    assert fixed_width_rows(b"").shape == (0, 0)
+    assert fixed_width_rows(b" \r\n\n").shape == (0, 0)
+    assert [bytes(r) for r in fixed_width_rows(b"single")] == [b"single"]
+    assert np.array_equal(fixed_width_rows(bytearray(b"ab\ncd")), [[97, 98], [99, 100]])
+
+
+def test_parse_int_data():
+    assert list(parse_int_data("1\n 22\n\n-3 \n")) == [1, 22, -3]
@@ -1,8 +1,41 @@
+import mmap
 import pathlib
 import sys
+from contextlib import contextmanager
 
+import numpy as np
 import requests
 
+WHITESPACE = b' \t\r\n'
+NEWLINE = ord('\n')
+CARRIAGE_RETURN = ord('\r')
+
+
+def _fetch_input_data(cache_file, url, cookie_file):
+    """
+    Pull the input data down from the AoC server, using the session cookie created on login, and store it in
+    the cache file.
+
+    :param cache_file:      The file in which the input data is stored
+    :param url:             The URL to the AoC page
+    :param cookie_file:     The path to the cookie file
+    :return: The raw input data as a string
+    """
+    try:
+        with open(cookie_file) as fh:
+            raw_cookies = fh.readlines()
+            cookies = dict(c.strip().split("=") for c in raw_cookies)
+    except FileNotFoundError:
+        print("Cookie file doesn't exist, can't pull the data. Either get the cookie, or download your input data"
+              "and store in 'cached_input.txt' in the cwd.")
+        sys.exit(1)
+
+    response = requests.get(url, cookies=cookies)
+    with open(cache_file, 'w') as fh:
+        raw_data = response.text
+        fh.write(raw_data)
+    return raw_data
+
 
 def load_input_data(cache_file, url, cookie_file):
     """
@@ -15,34 +48,207 @@ def load_input_data(cache_file, url, cookie_file):
 
     Note: The cookie file and input cache are gitignored as they're user specific.
 
+    This loads the whole input into memory - for large inputs, use `map_input_data` instead.
+
     :param cache_file:      The file in which the input data is stored
     :param url:             The URL to the AoC page
     :param cookie_file:     The path to the cookie file (only used if the cache file isn't found
     :return: The raw input data as a string
+    """
+
+    if not pathlib.Path(cache_file).is_file():
+        return _fetch_input_data(cache_file, url, cookie_file)
+
+    with open(cache_file) as fh:
+        raw_data = fh.read()
+
+    return raw_data
+
 
-    TODO: This is not super efficient since it loads the whole input into memory. Probably fine for now.
+def map_input_data(cache_file, url, cookie_file):
     """
+    As `load_input_data`, but rather than reading the cache file into a string, return a `MappedInput` that
+    memory-maps it on demand and hands out lines lazily.
 
+    :param cache_file:      The file in which the input data is stored
+    :param url:             The URL to the AoC page
+    :param cookie_file:     The path to the cookie file (only used if the cache file isn't found
+    :return: A `MappedInput` over the cache file
+    """
     if not pathlib.Path(cache_file).is_file():
-        try:
-            with open(cookie_file) as fh:
-                raw_cookies = fh.readlines()
-                cookies = dict(c.strip().split("=") for c in raw_cookies)
-        except FileNotFoundError:
-            print("Cookie file doesn't exist, can't pull the data. Either get the cookie, or download your input data"
-                  "and store in 'cached_input.txt' in the cwd.")
-            sys.exit(1)
-
-        response = requests.get(url, cookies=cookies)
-        with open(cache_file, 'w') as fh:
-            raw_data = response.text
-            fh.write(raw_data)
+        _fetch_input_data(cache_file, url, cookie_file)
+    return MappedInput(cache_file)
+
+
+class MappedInput:
+    """
+    Re-iterable, memory-mapped view of an input file.
+
+    Each iteration maps the file afresh and yields its lines (without the trailing newline), following the same
+    rules as `str.split("\n")`, so it can be dropped in anywhere the raw string was used. Only the current line is
+    ever decoded, so peak memory is a single line rather than copies of the whole file.
+    """
+
+    def __init__(self, path, encoding="utf-8"):
+        self.path = pathlib.Path(path)
+        self.encoding = encoding
+
+    @contextmanager
+    def open(self):
+        """
+        Map the file read-only and yield the buffer. Empty files can't be mapped, so yield `b""` for those.
+
+        If the map can't be closed because views onto it are still alive (e.g. a NumPy array held by the traceback
+        of an exception raised inside the block), it's left for the garbage collector to close, rather than
+        hiding that exception behind a `BufferError`.
+        """
+        with open(self.path, "rb") as fh:
+            try:
+                buffer = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                yield b""
+                return
+
+            try:
+                yield buffer
+            finally:
+                try:
+                    buffer.close()
+                except BufferError:
+                    pass
+
+    def __iter__(self):
+        with self.open() as buffer:
+            yield from _iter_buffer_lines(buffer, self.encoding)
+
+    def records(self):
+        return iter_records(self)
+
+
+def _iter_buffer_lines(buffer, encoding):
+    start = 0
+    while True:
+        end = buffer.find(b"\n", start)
+        if end == -1:
+            yield buffer[start:].decode(encoding)
+            return
+        yield buffer[start:end].decode(encoding)
+        start = end + 1
+
+
+def _iter_str_lines(data):
+    start = 0
+    while True:
+        end = data.find("\n", start)
+        if end == -1:
+            yield data[start:]
+            return
+        yield data[start:end]
+        start = end + 1
+
+
+def _iter_file_lines(lines):
+    ends_with_newline = True
+    for line in lines:
+        ends_with_newline = line.endswith("\n")
+        yield line[:-1] if ends_with_newline else line
+
+    if ends_with_newline:
+        yield ""
+
+
+def iter_lines(data, encoding="utf-8"):
+    """
+    Lazily split the input into lines, without building the full list that `data.split("\n")` would.
+
+    Accepts the raw input string, a bytes-like buffer (e.g. an mmap), a `MappedInput` or any other iterable of
+    lines (e.g. an open file). Whatever the source, the lines produced are exactly those of `str.split("\n")`.
+
+    :param data:        The input data
+    :param encoding:    Used to decode bytes-like buffers
+    :return: A generator over the lines of the input
+    """
+    if isinstance(data, str):
+        return _iter_str_lines(data)
+    if isinstance(data, (bytes, bytearray, mmap.mmap)):
+        return _iter_buffer_lines(data, encoding)
+    if isinstance(data, MappedInput):
+        return iter(data)
+    return _iter_file_lines(data)
+
+
+def iter_records(data):
+    """
+    Group the lines of the input into blank-line separated records.
+
+    :param data: Anything accepted by `iter_lines`
+    :return: A generator over records, each a list of the (non-blank) lines it contains
+    """
+    record = []
+    for line in iter_lines(data):
+        if line.strip() == "":
+            if record:
+                yield record
+                record = []
+            continue
+        record.append(line)
+
+    if record:
+        yield record
+
+
+@contextmanager
+def input_buffer(data, encoding="utf-8"):
+    """
+    Provide the input as a single bytes-like buffer, for the parsers that work on the raw bytes.
+
+    A `MappedInput` yields its memory map, strings are encoded and anything else is assumed to be bytes-like already.
+
+    :param data:        The input data
+    :param encoding:    Used to encode string input
+    """
+    if isinstance(data, MappedInput):
+        with data.open() as buffer:
+            yield buffer
+    elif isinstance(data, str):
+        yield data.encode(encoding)
     else:
-        with open(cache_file) as fh:
-            raw_data = fh.read()
+        yield data
 
-    return raw_data
+
+def fixed_width_rows(buffer):
+    """
+    View the input as a matrix of bytes, one row per line, without copying it - if every line is the same width.
+
+    Whitespace around the input (blank lines included) is ignored. The line endings can be LF or CRLF, and the last
+    line doesn't need one. Only the line endings are checked: it's up to the caller to check what's in the rows,
+    which also rules out any stray line breaks.
+
+    :param buffer:  The raw input, as a bytes-like buffer
+    :return:        A read-only (rows, width) uint8 view of the buffer, or None if the lines aren't laid out evenly
+    """
+    start, stop = 0, len(buffer)
+    while start < stop and buffer[start] in WHITESPACE:
+        start += 1
+    while stop > start and buffer[stop - 1] in WHITESPACE:
+        stop -= 1
+    if start == stop:
+        return np.zeros((0, 0), dtype=np.uint8)
+
+    raw = np.frombuffer(buffer, dtype=np.uint8)[start:stop]
+    first_newline = buffer.find(b"\n", start, stop)
+    stride = first_newline - start + 1 if first_newline != -1 else len(raw) + 1
+    width = stride - 1 - int(stride > 1 and raw[stride - 2] == CARRIAGE_RETURN)
+
+    # The last line has lost its line ending to the stripping, so add it back on to count the lines
+    height, remainder = divmod(len(raw) + stride - width, stride)
+    if remainder != 0 or not np.all(raw[stride - 1::stride] == NEWLINE):
+        return None
+    if stride - width == 2 and not np.all(raw[stride - 2::stride] == CARRIAGE_RETURN):
+        return None
+
+    return np.lib.stride_tricks.as_strided(raw, shape=(height, width), strides=(stride, 1), writeable=False)
 
 
 def parse_int_data(raw_data):
-    return (int(line.strip()) for line in raw_data.split("\n") if line.strip() != "")
+    return (int(line.strip()) for line in iter_lines(raw_data) if line.strip() != "")